@@ -4,6 +4,8 @@ from django.contrib import admin
 from backend import models
 
 admin.site.register(models.Receipt)
+admin.site.register(models.Place)
 admin.site.register(models.Product)
 admin.site.register(models.Company)
 admin.site.register(models.TrashComponent)
+admin.site.register(models.ReportJob)
@@ -0,0 +1,74 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend import routers
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token that also carries the claims ClaimsUser needs, access
+    tokens made from it inherit them."""
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['is_staff'] = user.is_staff
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """request.user of CachedUserAuthentication (see
+    SIMPLE_JWT['TOKEN_USER_CLASS']): id, username and is_staff come from the
+    signed token, the User row is loaded through `instance`."""
+    @cached_property
+    def instance(self):
+        return get_user(self.id)
+
+
+class CachedUserAuthentication(JWTStatelessUserAuthentication):
+    """Like JWTAuthentication, rejects tokens of deleted and inactive users,
+    but checks them against the get_user cache instead of a query per
+    request."""
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if not user.instance.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+
+_users = {}
+_users_lock = threading.Lock()
+_users_max_size = 1024
+
+
+def get_user(pk):
+    now = time.monotonic()
+    with _users_lock:
+        entry = _users.get(pk)
+    if entry is not None and entry[0] > now:
+        return copy.copy(entry[1])
+    try:
+        # a new user may not have reached the replicas yet
+        with routers.primary():
+            user = User.objects.get(pk=pk)
+    except User.DoesNotExist:
+        raise AuthenticationFailed('User not found', code='user_not_found')
+    with _users_lock:
+        _users.pop(pk, None)
+        if len(_users) >= _users_max_size:
+            _users.pop(next(iter(_users)))
+        _users[pk] = (now + settings.USER_CACHE_TTL, user)
+    return copy.copy(user)
+
+
+def forget_user(pk):
+    with _users_lock:
+        _users.pop(pk, None)
@@ -0,0 +1,37 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from backend import cache, fastread, models, routers
+
+
+# Per process LRU of scanned products: barcode -> (catalogue versions, data).
+# Entries are tagged with the backend.cache versions of Product and
+# TrashComponent that the signals bump on every change. The versions are
+# read before the product, so an entry never outlives a change, in this
+# process or in any other one sharing the cache.
+_products = OrderedDict()
+_products_lock = threading.Lock()
+
+
+def lookup(barcode):
+    """ProductGetSerializer data of the product with the given normalized
+    barcode, None if there is no such product."""
+    versions = cache.get_versions([models.Product, models.TrashComponent])
+    with _products_lock:
+        entry = _products.get(barcode)
+        if entry is not None and entry[0] == versions:
+            _products.move_to_end(barcode)
+            return entry[1]
+    # from the primary, like backend.cache responses
+    with routers.primary():
+        data = fastread.product_by_barcode(barcode)
+    if data is None:
+        return None
+    with _products_lock:
+        _products[barcode] = (versions, data)
+        _products.move_to_end(barcode)
+        while len(_products) > settings.BARCODE_CACHE_SIZE:
+            _products.popitem(last=False)
+    return data
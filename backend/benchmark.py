@@ -0,0 +1,216 @@
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (CaptureQueriesContext, setup_test_environment,
+            teardown_test_environment)
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from backend import models, synthetic, fastread, middleware, renderers
+from backend.renderers import ORJSONRenderer, MessagePackRenderer
+
+
+# (name, method, path, body), {product} and {barcode} are replaced by the id
+# and the barcode of an existing product
+ENDPOINTS = [
+    ('receipt stats', 'get', '/receipt/?stats=true', None),
+    ('receipt stats by place', 'get', '/receipt/?stats=true&place=Place%200', None),
+    ('receipt list', 'get', '/receipt/', None),
+    ('receipt cursor list', 'get', '/receipt/?pagination=cursor', None),
+    ('product list', 'get', '/product/', None),
+    ('product detail', 'get', '/product/?pk={product}', None),
+    ('product barcode', 'get', '/product/barcode?code={barcode}', None),
+    ('auth login', 'post', '/auth/login',
+     {'username': 'user0', 'password': synthetic.PASSWORD}),
+]
+
+
+def dataset(receipts):
+    """Synthetic dataset parameters scaled from the number of receipts."""
+    return {
+        'receipts': receipts,
+        'products': max(receipts // 20, 10),
+        'companies': max(receipts // 1000, 5),
+        'components': max(receipts // 200, 20),
+        'users': max(receipts // 100, 5),
+        'places': max(receipts // 500, 5),
+    }
+
+
+def _percentile(values, percent):
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+class _Endpoint:
+    def __init__(self, name, method, path, body):
+        self.name, self.method, self.path, self.body = name, method, path, body
+        self.local = threading.local()
+
+    def request(self, _=None):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client()
+        with CaptureQueriesContext(connections['default']) as queries:
+            start = time.perf_counter()
+            if self.method == 'get':
+                response = client.get(self.path)
+            else:
+                response = client.post(self.path, self.body,
+                                       content_type='application/json')
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries), response.status_code
+
+
+def measure(endpoint, concurrency, requests):
+    endpoint.request()  # warm up
+    tracemalloc.start()
+    endpoint.request()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        samples = list(pool.map(endpoint.request, range(requests)))
+        wall = time.perf_counter() - start
+        # every worker closes its own connection to the test database
+        barrier = threading.Barrier(concurrency)
+        list(pool.map(lambda _: (barrier.wait(), connections.close_all()),
+                      range(concurrency)))
+
+    latencies = [elapsed * 1000 for elapsed, _, _ in samples]
+    return {
+        'endpoint': endpoint.name,
+        'path': endpoint.path,
+        'concurrency': concurrency,
+        'requests': requests,
+        'throughput_rps': round(requests / wall, 1),
+        'p50_ms': round(_percentile(latencies, 50), 2),
+        'p95_ms': round(_percentile(latencies, 95), 2),
+        'p99_ms': round(_percentile(latencies, 99), 2),
+        'queries_per_request': statistics.mean(count for _, count, _ in samples),
+        'peak_memory_kb': round(peak_memory / 1024, 1),
+        'status_codes': sorted({status for _, _, status in samples}),
+    }
+
+
+@contextmanager
+def _benchmark_environment():
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    if connection.vendor == 'sqlite':
+        # Closing an in-memory SQLite database is a no-op, use a file so
+        # that every size starts from an empty database
+        test_settings['NAME'] = os.path.join(tempfile.gettempdir(),
+                                             'drftrash_benchmark.sqlite3')
+    # one log line per request would drown the report
+    timing_logger = logging.getLogger('backend.timing')
+    old_level = timing_logger.level
+    timing_logger.setLevel(logging.WARNING)
+    setup_test_environment()
+    try:
+        yield
+    finally:
+        teardown_test_environment()
+        test_settings['NAME'] = old_test_name
+        timing_logger.setLevel(old_level)
+
+
+@contextmanager
+def _dataset_database(size, seed):
+    """Fresh test database filled with the synthetic dataset for `size`
+    receipts, yields the time the generation took."""
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False)
+    try:
+        cache.clear()
+        start = time.perf_counter()
+        synthetic.generate(seed=seed, **dataset(size))
+        yield time.perf_counter() - start
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def run(sizes, concurrency, requests, seed=0, endpoints=None, log=None):
+    """Benchmark the endpoints against a fresh test database per dataset
+    size and return the report as a JSON-serializable dict."""
+    report = {'seed': seed, 'sizes': []}
+    with _benchmark_environment():
+        for size in sizes:
+            with _dataset_database(size, seed) as generated:
+                product, barcode = (models.Product.objects.order_by('pk')
+                                    .values_list('pk', 'barcode').first())
+                results = []
+                for name, method, path, body in ENDPOINTS:
+                    if endpoints and name not in endpoints:
+                        continue
+                    path = path.format(product=product, barcode=barcode)
+                    endpoint = _Endpoint(name, method, path, body)
+                    for level in concurrency:
+                        if log:
+                            log('%s receipts, %s, concurrency %s' % (size, name, level))
+                        results.append(measure(endpoint, level, requests))
+            report['sizes'].append({'dataset': dataset(size),
+                                    'generate_seconds': round(generated, 2),
+                                    'results': results})
+    return report
+
+
+def _encoders():
+    encoders = [('json', JSONRenderer().render),
+                ('orjson', ORJSONRenderer().render)]
+    if renderers.msgpack is not None:
+        encoders.append(('msgpack', MessagePackRenderer().render))
+    return encoders
+
+
+def _compressors():
+    compressors = [('gzip', compress_string)]
+    if middleware.brotli is not None:
+        compressors.append(('br', lambda content: middleware.brotli.compress(
+            content, quality=middleware.CompressionMiddleware.brotli_quality)))
+    return compressors
+
+
+def _timed(function, argument, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(argument)
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def run_wire(size, pages, page_size, repeat=20, seed=0):
+    """Compare the size and encode time of receipt list pages in every
+    available wire format, raw and compressed."""
+    with _benchmark_environment(), _dataset_database(size, seed):
+        pks = list(models.Receipt.objects.order_by('-time', '-pk')
+                   .values_list('pk', flat=True)[:pages * page_size])
+        payloads = [{'count': size, 'next': None, 'previous': None,
+                     'results': fastread.receipt_list(pks[start:start + page_size])}
+                    for start in range(0, len(pks), page_size)]
+        results = []
+        for name, encode in _encoders():
+            encoded, encode_ms = zip(*(_timed(encode, payload, repeat)
+                                       for payload in payloads))
+            result = {'format': name,
+                      'bytes': statistics.mean(len(content) for content in encoded),
+                      'encode_ms': round(statistics.mean(encode_ms), 3)}
+            for compressor, compress in _compressors():
+                compressed, compress_ms = zip(*(_timed(compress, content, repeat)
+                                                for content in encoded))
+                result[compressor + '_bytes'] = statistics.mean(len(content) for content in compressed)
+                result[compressor + '_ms'] = round(statistics.mean(compress_ms), 3)
+            results.append(result)
+    return {'dataset': dataset(size), 'seed': seed, 'pages': len(payloads),
+            'page_size': page_size, 'results': results}
@@ -0,0 +1,93 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from backend import routers
+
+
+_counters = {'hits': 0, 'misses': 0}
+_counters_lock = threading.Lock()
+
+
+def _version_key(model):
+    return 'version:%s' % model._meta.label_lower
+
+
+def bump_version(model):
+    key = _version_key(model)
+    # Start from the current time rather than 1 so that a version evicted
+    # from the cache can't come back and match old responses.
+    cache.add(key, time.time_ns(), None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def get_versions(models):
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        cache.add(key, time.time_ns(), None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return [str(versions.get(key, 0)) for key in keys]
+
+
+def response_key(view, request, models):
+    query = urlencode(sorted((name, value)
+                             for name, values in request.GET.lists()
+                             for value in values))
+    digest = hashlib.md5(('%s?%s|%s' % (request.path, query, request.accepted_media_type))
+                         .encode()).hexdigest()
+    return 'response:%s:%s:%s:%s:%s' % (
+        type(view).__name__, view.action, request.get_host(),
+        '.'.join(get_versions(models)), digest)
+
+
+def _count(counter):
+    with _counters_lock:
+        _counters[counter] += 1
+
+
+def stats():
+    with _counters_lock:
+        hits, misses = _counters['hits'], _counters['misses']
+    total = hits + misses
+    return {'hits': hits, 'misses': misses,
+            'hit_ratio': hits / total if total else 0.0}
+
+
+def cached_response(*models):
+    """Cache the data of successful responses of a GET view method.
+
+    Keys are built from the normalized query string, the negotiated media
+    type and the versions of `models`, which are bumped by backend.signals
+    on every write, so a write invalidates exactly the responses that depend
+    on the changed model.
+    Misses are read from the primary, a replica could still be behind the
+    version.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            key = response_key(self, request, models)
+            data = cache.get(key)
+            if data is not None:
+                _count('hits')
+                return Response(data)
+            _count('misses')
+            with routers.primary():
+                response = method(self, request, *args, **kwargs)
+            if response.status_code == 200 and isinstance(response, Response):
+                cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
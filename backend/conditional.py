@@ -0,0 +1,112 @@
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def _latest(updated, depends):
+    for model in depends:
+        other = model.objects.aggregate(updated=Max('updated_at'))['updated']
+        if other and (updated is None or other > updated):
+            updated = other
+    return updated
+
+
+def _etag(request, *parts):
+    query = urlencode(sorted((name, value)
+                             for name, values in request.GET.lists()
+                             for value in values))
+    # each format of the response is a representation of its own
+    tag = '|'.join(['%s?%s' % (request.path, query), request.accepted_media_type]
+                   + [str(part) for part in parts])
+    return 'W/"%s"' % hashlib.md5(tag.encode()).hexdigest()
+
+
+def _object_validators(view, request, depends):
+    """ETag and Last-Modified of the single object or multi-get response
+    `view` is about to build for `request`, computed from indexed updated_at
+    lookups only. Returns (None, None) when the ids are invalid or missing."""
+    pk = request.GET.get('pk')
+    queryset = view.get_queryset()
+    if ',' in pk:
+        pks = pk.split(',')
+        if not all(pk.isdigit() for pk in pks):
+            return None, None
+        # a deleted id lowers the count
+        result = (queryset.filter(pk__in=pks).order_by()
+                          .aggregate(count=Count('pk'), updated=Max('updated_at')))
+        count, updated = result['count'], result['updated']
+    else:
+        if not pk.isdigit():
+            return None, None
+        updated = queryset.filter(pk=pk).values_list('updated_at', flat=True).first()
+        if updated is None:
+            return None, None
+        count = 1
+    updated = _latest(updated, depends)
+    etag = _etag(request, count, updated.isoformat() if updated else '')
+    return etag, int(updated.timestamp()) if updated else None
+
+
+def _page_etag(view, request, data, depends):
+    """ETag of a paginated list response, from the keys of the objects on
+    the page, their updated_at and the rest of the envelope (count, links,
+    stats). None for responses that aren't a page."""
+    if not isinstance(data, dict) or not isinstance(data.get('results'), list):
+        return None
+    pks = [item['pk'] for item in data['results']]
+    updated = (view.get_queryset().filter(pk__in=pks).order_by()
+                   .aggregate(updated=Max('updated_at'))['updated'])
+    updated = _latest(updated, depends)
+    envelope = sorted((name, repr(value)) for name, value in data.items() if name != 'results')
+    return _etag(request, pks, envelope, updated.isoformat() if updated else '')
+
+
+def conditional(*depends):
+    """Add ETag/Last-Modified to a single object, multi-get or list GET and
+    answer If-None-Match/If-Modified-Since with 304.
+
+    Single objects and multi-gets are checked before the view loads
+    anything. Lists are checked against the page the view built, so that
+    they never cost more than the page itself; they only get an ETag, as a
+    page can change without any of its objects getting newer.
+
+    `depends` are the models, besides the view's own, whose changes show up
+    in the response without touching the view's objects. Validators differ
+    per negotiated media type and responses, 304s included, vary on Accept.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if not request.GET.get('pk'):
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != 200 or not isinstance(response, Response):
+                    return response
+                etag = _page_etag(self, request, response.data, depends)
+                if etag is None:
+                    return response
+                response = get_conditional_response(request, etag=etag) or response
+                response['ETag'] = etag
+                patch_vary_headers(response, ('Accept',))
+                return response
+
+            etag, last_modified = _object_validators(self, request, depends)
+            if etag is None:
+                return method(self, request, *args, **kwargs)
+            response = get_conditional_response(request, etag=etag,
+                                                last_modified=last_modified)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ('Accept',))
+            return response
+        return wrapper
+    return decorator
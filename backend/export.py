@@ -0,0 +1,57 @@
+import csv
+import json
+
+from rest_framework.fields import DateTimeField
+
+from backend import models
+
+
+COLUMNS = ['receipt', 'time', 'place', 'user',
+           'product', 'product_name', 'company', 'product_type',
+           'component', 'component_name', 'recyclable', 'mass']
+
+FIELDS = ['pk', 'time', 'place__name', 'user',
+          'products__pk', 'products__name', 'products__company', 'products__type',
+          'products__trash__pk', 'products__trash__name',
+          'products__trash__recyclable', 'products__trash__mass']
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+CHUNK_SIZE = 2000
+
+
+def receipt_rows(receipts):
+    """Flattened (receipt, product, component) rows of the given receipts,
+    read from the database in chunks."""
+    time_field = DateTimeField()
+    labels = dict(models.Recyclable.choices)
+    rows = (models.Receipt.objects
+            .filter(pk__in=receipts.values('pk'))
+            .order_by('pk')
+            .values_list(*FIELDS)
+            .iterator(chunk_size=CHUNK_SIZE))
+    for row in rows:
+        row = list(row)
+        row[1] = time_field.to_representation(row[1])
+        if row[10] is not None:
+            row[10] = labels[row[10]]
+        yield row
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream(rows, output):
+    if output == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(COLUMNS)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + '\n'
@@ -0,0 +1,113 @@
+from rest_framework.fields import DateTimeField
+
+from backend import models
+
+
+# Plain dict versions of ProductGetSerializer and ReceiptGetSerializer for
+# the GET endpoints. The data comes from flat values_list() rows and every
+# product and component dict is built once and shared by all the receipts
+# and products containing it. backend/tests.py checks that the rendered
+# output is identical to the serializers'.
+
+_time_field = DateTimeField()
+_labels = dict(models.Recyclable.choices)
+
+
+_product_fields = ['pk', 'name', 'barcode', 'company', 'type', 'trash_mass',
+                   'trash_count', 'recyclable_share']
+_component_fields = ['pk', 'name', 'recyclable', 'mass']
+
+
+def _product(pk, name, barcode, company, type, trash_mass, trash_count, recyclable_share):
+    return {
+        'name': name,
+        'barcode': barcode,
+        'company': company,
+        'type': type,
+        'trash_set': [],
+        'trash_mass': trash_mass,
+        'trash_count': trash_count,
+        'recyclable_share': recyclable_share,
+        'pk': pk,
+    }
+
+
+def _component(pk, name, recyclable, mass):
+    return {
+        'name': name,
+        'recyclable': _labels[recyclable],
+        'mass': mass,
+        'pk': pk,
+    }
+
+
+def products(pks):
+    """ProductGetSerializer data of the given products as a {pk: dict}."""
+    result = {}
+    rows = (models.Product.objects
+            .filter(pk__in=pks)
+            .values_list(*_product_fields))
+    for row in rows:
+        result[row[0]] = _product(*row)
+    components = {}
+    rows = (models.TrashComponent.objects
+            .filter(product__in=list(result))
+            .order_by('pk')
+            .values_list('product', *_component_fields))
+    for product, *row in rows:
+        component = components.get(row[0])
+        if component is None:
+            component = components[row[0]] = _component(*row)
+        result[product]['trash_set'].append(component)
+    return result
+
+
+def product_by_barcode(barcode):
+    """ProductGetSerializer data of the product with the given (normalized)
+    barcode or None, read with one query over the barcode index."""
+    rows = (models.Product.objects
+            .filter(barcode=barcode)
+            .order_by('trash__pk')
+            .values_list(*_product_fields,
+                         *['trash__' + field for field in _component_fields]))
+    result = None
+    for row in rows:
+        if result is None:
+            result = _product(*row[:len(_product_fields)])
+        if row[len(_product_fields)] is not None:
+            result['trash_set'].append(_component(*row[len(_product_fields):]))
+    return result
+
+
+def product_list(pks):
+    """ProductGetSerializer data of the given products, in the given order,
+    skipping missing ones."""
+    pks = list(pks)
+    data = products(pks)
+    return [data[pk] for pk in pks if pk in data]
+
+
+def receipt_list(pks):
+    """ReceiptGetSerializer data of the given receipts, in the given order,
+    skipping missing ones."""
+    pks = list(pks)
+    result = {}
+    rows = (models.Receipt.objects
+            .filter(pk__in=pks)
+            .values_list('pk', 'time', 'place__name', 'user'))
+    for pk, time, place, user in rows:
+        result[pk] = {
+            'products_set': [],
+            'time': _time_field.to_representation(time),
+            'place': place,
+            'pk': pk,
+            'user': user,
+        }
+    links = list(models.Receipt.products.through.objects
+                 .filter(receipt__in=list(result))
+                 .order_by('product')
+                 .values_list('receipt', 'product'))
+    product_data = products({product for _, product in links})
+    for receipt, product in links:
+        result[receipt]['products_set'].append(product_data[product])
+    return [result[pk] for pk in pks if pk in result]
@@ -0,0 +1,42 @@
+from django.db.models import Q
+from django_filters import rest_framework as filters
+
+from backend import models
+
+
+class TrashComponentFilter(filters.FilterSet):
+    # recyclability is filtered by label, the stored value is its code
+    recyclable = filters.CharFilter(method='filter_recyclable')
+
+    class Meta:
+        model = models.TrashComponent
+        fields = ['name', 'mass']
+
+    def filter_recyclable(self, queryset, name, value):
+        recyclable = models.Recyclable.parse(value)
+        if recyclable is None:
+            return queryset.none()
+        return queryset.filter(recyclable=recyclable)
+
+
+class ReceiptFilter(filters.FilterSet):
+    # places are filtered by name, the receipts are then found by place id
+    place = filters.CharFilter(method='filter_place')
+    region = filters.CharFilter(method='filter_region')
+
+    class Meta:
+        model = models.Receipt
+        fields = {
+            'time': ['gte', 'lte'],
+            'products': ['exact'],
+            'user': ['exact'],
+        }
+
+    def filter_place(self, queryset, name, value):
+        places = models.Place.objects.filter(key=models.place_key(value))
+        return queryset.filter(place__in=places.values('pk'))
+
+    def filter_region(self, queryset, name, value):
+        region = models.Place.objects.filter(key=models.place_key(value)).values('pk')
+        places = models.Place.objects.filter(Q(pk__in=region) | Q(parent__in=region))
+        return queryset.filter(place__in=places.values('pk'))
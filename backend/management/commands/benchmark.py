@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from backend import benchmark
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',')]
+
+
+class Command(BaseCommand):
+    help = ('Measure endpoint latency, queries per request and peak memory on '
+            'synthetic datasets of several sizes, in a throwaway test database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=_int_list, default=[1000, 10000],
+                            help='Comma separated numbers of receipts')
+        parser.add_argument('--concurrency', type=_int_list, default=[1, 4],
+                            help='Comma separated numbers of concurrent clients')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Requests per endpoint and concurrency level')
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            choices=[name for name, _, _, _ in benchmark.ENDPOINTS],
+                            help='Only benchmark this endpoint, can be repeated')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        report = benchmark.run(options['sizes'], options['concurrency'],
+                               options['requests'], seed=options['seed'],
+                               endpoints=options['endpoints'],
+                               log=self.stderr.write)
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,25 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from backend import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Compare payload bytes and encode time of real receipt list pages '
+            'in JSON, orjson and MessagePack, raw and compressed')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=10000,
+                            help='Number of receipts in the synthetic dataset')
+        parser.add_argument('--pages', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Encodings per page to average the time over')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        report = benchmark.run_wire(options['size'], options['pages'],
+                                    options['page_size'], repeat=options['repeat'],
+                                    seed=options['seed'])
+        self.stdout.write(json.dumps(report, indent=2))
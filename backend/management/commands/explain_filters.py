@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django_filters.rest_framework import DjangoFilterBackend
+
+from backend import views
+from backend.stats import statistics_query
+
+
+VIEWSETS = [
+    views.CompanyViewSet,
+    views.TrashComponentViewSet,
+    views.ProductViewSet,
+    views.ReceiptViewSet,
+]
+
+# Filter combinations used together by the clients
+RECEIPT_COMBINATIONS = [
+    ['user', 'time__gte', 'time__lte'],
+    ['place', 'time__gte', 'time__lte'],
+    ['region', 'time__gte', 'time__lte'],
+]
+
+# Filters by name, sampled from these paths instead of the filter field
+SAMPLE_FIELDS = {
+    'place': 'place__name',
+    'region': 'place__parent__name',
+}
+
+
+class Command(BaseCommand):
+    help = ("Print the database query plan of every viewset filter and of the "
+            "receipt stats query, to check that they are served by indexes")
+
+    def handle(self, *args, **options):
+        backend = DjangoFilterBackend()
+        for viewset in VIEWSETS:
+            queryset = viewset.queryset.all()
+            filterset_class = backend.get_filterset_class(viewset(), queryset)
+            params = [[name] for name in filterset_class.base_filters]
+            if viewset is views.ReceiptViewSet:
+                params += RECEIPT_COMBINATIONS
+            for names in params:
+                data = {name: self.sample(queryset, filterset_class.base_filters[name])
+                        for name in names}
+                filtered = filterset_class(data=data, queryset=queryset).qs
+                self.explain('%s %s' % (viewset.__name__, ' & '.join(names)), filtered)
+                if viewset is views.ReceiptViewSet:
+                    self.explain('  stats', statistics_query(filtered))
+
+    def sample(self, queryset, filter):
+        field_name = SAMPLE_FIELDS.get(filter.field_name, filter.field_name)
+        value = (queryset.order_by().exclude(**{field_name: None})
+                         .values_list(field_name, flat=True).first())
+        if value is None:
+            return '1'
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
+
+    def explain(self, title, queryset):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for line in queryset.explain().splitlines():
+            self.stdout.write('    ' + line)
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend import synthetic
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a seeded synthetic dataset using bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=100)
+        parser.add_argument('--components', type=int, default=500)
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--receipts', type=int, default=100000)
+        parser.add_argument('--basket', type=int, default=8,
+                            help='Average number of products per receipt')
+        parser.add_argument('--places', type=int, default=200)
+        parser.add_argument('--days', type=int, default=365,
+                            help='Receipts are spread over this many past days')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        options = {name: options[name] for name in (
+            'companies', 'components', 'products', 'users', 'receipts',
+            'basket', 'places', 'days', 'seed')}
+        start = time.perf_counter()
+        synthetic.generate(**options)
+        self.stdout.write('Generated %s in %.1fs (user password: %r)' % (
+            ', '.join('%s=%s' % item for item in options.items()),
+            time.perf_counter() - start, synthetic.PASSWORD))
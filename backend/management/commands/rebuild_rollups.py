@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from backend import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily waste rollup tables from the raw receipts'
+
+    def handle(self, *args, **options):
+        rollups.rebuild()
+        for model, _, _ in rollups.ROLLUPS:
+            self.stdout.write('%s: %d rows' % (model.__name__,
+                                               model.objects.count()))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from backend import models, reports
+
+
+class Command(BaseCommand):
+    help = ('Run the report jobs left pending or running by a stopped server. '
+            'Only use it while the server is not running')
+
+    def handle(self, *args, **options):
+        (models.ReportJob.objects
+         .filter(status=models.ReportStatus.RUNNING)
+         .update(status=models.ReportStatus.PENDING))
+        pending = (models.ReportJob.objects
+                   .filter(status=models.ReportStatus.PENDING)
+                   .order_by('pk')
+                   .values_list('pk', flat=True))
+        for pk in pending:
+            reports.run(pk)
+            self.stdout.write('report %d: %s' % (pk, models.ReportJob.objects
+                                                 .get(pk=pk).status))
@@ -0,0 +1,79 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from backend import cache
+
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, name, help):
+        self.name, self.help = name, help
+        self.series = defaultdict(lambda: [[0] * (len(BUCKETS) + 1), 0.0])
+
+    def observe(self, labels, value):
+        counts, _ = series = self.series[labels]
+        counts[bisect_left(BUCKETS, value)] += 1
+        series[1] += value
+
+    def render(self, label_names):
+        yield '# HELP %s %s' % (self.name, self.help)
+        yield '# TYPE %s histogram' % self.name
+        for labels, (counts, total) in sorted(self.series.items()):
+            labels = _labels(zip(label_names, labels))
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), counts):
+                cumulative += count
+                yield '%s_bucket{%s,le="%s"} %d' % (self.name, labels, bound, cumulative)
+            yield '%s_sum{%s} %r' % (self.name, labels, total)
+            yield '%s_count{%s} %d' % (self.name, labels, cumulative)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(pairs):
+    return ','.join('%s="%s"' % (name, _escape(value)) for name, value in pairs)
+
+
+_lock = threading.Lock()
+_duration = Histogram('drftrash_request_duration_seconds',
+                      'Time spent handling a request')
+_db_duration = Histogram('drftrash_request_db_duration_seconds',
+                         'Time spent in SQL queries per request')
+_queries = defaultdict(int)
+_requests = defaultdict(int)
+
+
+def observe(route, method, status, duration, db_duration, queries):
+    with _lock:
+        _duration.observe((route, method), duration)
+        _db_duration.observe((route, method), db_duration)
+        _queries[(route, method)] += queries
+        _requests[(route, method, status)] += 1
+
+
+def render():
+    """All metrics of this process in the Prometheus text format."""
+    with _lock:
+        lines = list(_duration.render(('route', 'method')))
+        lines += _db_duration.render(('route', 'method'))
+        lines += ['# HELP drftrash_requests_total Handled requests',
+                  '# TYPE drftrash_requests_total counter']
+        lines += ['drftrash_requests_total{%s} %d' % (
+                      _labels(zip(('route', 'method', 'status'), labels)), count)
+                  for labels, count in sorted(_requests.items())]
+        lines += ['# HELP drftrash_db_queries_total SQL queries run by requests',
+                  '# TYPE drftrash_db_queries_total counter']
+        lines += ['drftrash_db_queries_total{%s} %d' % (
+                      _labels(zip(('route', 'method'), labels)), count)
+                  for labels, count in sorted(_queries.items())]
+    cache_stats = cache.stats()
+    lines += ['# HELP drftrash_response_cache_total Response cache lookups',
+              '# TYPE drftrash_response_cache_total counter',
+              'drftrash_response_cache_total{result="hit"} %d' % cache_stats['hits'],
+              'drftrash_response_cache_total{result="miss"} %d' % cache_stats['misses']]
+    return '\n'.join(lines) + '\n'
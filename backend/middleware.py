@@ -0,0 +1,170 @@
+import json
+import logging
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from backend import metrics
+from backend.routers import reads_from_replica, wrote_primary
+
+
+logger = logging.getLogger('backend.timing')
+
+
+class TimingMiddleware:
+    """Measure SQL query count and time, view time and render time of every
+    request. The numbers go to a Server-Timing header, a JSON log line on
+    the backend.timing logger and the per-route histograms of
+    backend.metrics."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = request._timing = {'queries': 0, 'db': 0.0,
+                                    'view_start': None, 'view_end': None}
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                timing['db'] += time.perf_counter() - start
+                timing['queries'] += 1
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(record_query))
+            response = self.get_response(request)
+        end = time.perf_counter()
+
+        view_start = timing['view_start'] or start
+        view_end = timing['view_end'] or end
+        durations = {
+            'db': timing['db'],
+            'view': view_end - view_start,
+            'render': end - view_end,
+            'total': end - start,
+        }
+        response['Server-Timing'] = ', '.join(
+            '%s;dur=%.2f' % (name, duration * 1000)
+            for name, duration in durations.items()
+        ) + ', queries;desc="%d"' % timing['queries']
+
+        match = request.resolver_match
+        route = match.route if match else 'unmatched'
+        metrics.observe(route, request.method, response.status_code,
+                        durations['total'], durations['db'], timing['queries'])
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(dict(
+                {name: round(duration * 1000, 2) for name, duration in durations.items()},
+                method=request.method, route=route, path=request.path,
+                status=response.status_code, queries=timing['queries'])))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing['view_start'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this, so the rest is render time
+        request._timing['view_end'] = time.perf_counter()
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Django's GZipMiddleware with a RESPONSE_COMPRESSION_MIN_SIZE threshold,
+    and brotli (when installed) for the clients that accept it.
+
+    gzip keeps GZipMiddleware's BREACH mitigation, random bytes in the gzip
+    header. Brotli has no room for them, so it is only used for responses to
+    safe requests, which never hold tokens."""
+
+    accepts_brotli = re.compile(r'\bbr\b')
+    brotli_quality = 4
+    brotli_methods = ('GET', 'HEAD')
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+            return response
+        if (brotli is None or response.streaming
+                or request.method not in self.brotli_methods
+                or response.has_header('Content-Encoding')
+                or not self.accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        content = brotli.compress(response.content, quality=self.brotli_quality)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'br'
+        return response
+
+
+class NegotiationMiddleware:
+    """Add Accept to the Vary header of DRF responses, their format is
+    negotiated from it."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if getattr(response, 'accepted_renderer', None) is not None:
+            patch_vary_headers(response, ('Accept',))
+        return response
+
+
+class ReplicaMiddleware:
+    """Let the reads of safe requests go to the read replicas (see
+    backend.routers). A client whose request wrote to the primary and
+    succeeded reads the primary for the next REPLICA_PIN_SECONDS, so it sees
+    its own writes despite the replication lag."""
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+    pin_cookie = 'pin_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replica = (request.method in self.safe_methods
+                   and self.pin_cookie not in request.COOKIES)
+        token = reads_from_replica.set(replica)
+        wrote_token = wrote_primary.set(False)
+        try:
+            response = self.get_response(request)
+            wrote = wrote_primary.get()
+        finally:
+            reads_from_replica.reset(token)
+            wrote_primary.reset(wrote_token)
+        if replica and response.streaming:
+            response.streaming_content = self.read_replica(response.streaming_content)
+        # a failed request's writes were rolled back or never made
+        if wrote and response.status_code < 400:
+            response.set_cookie(self.pin_cookie, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def read_replica(self, content):
+        # streamed content is read from the database after __call__ returned
+        token = reads_from_replica.set(True)
+        try:
+            yield from content
+        finally:
+            reads_from_replica.reset(token)
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import TruncDate
+
+
+def fill_rollups(apps, schema_editor):
+    Receipt = apps.get_model('backend', 'Receipt')
+    for name, field, path in (('DailyUserWaste', 'user_id', 'user'),
+                              ('DailyPlaceWaste', 'place', 'place'),
+                              ('DailyCompanyWaste', 'company_id', 'products__company')):
+        model = apps.get_model('backend', name)
+        rows = (Receipt.objects
+                .annotate(day=TruncDate('time'))
+                .order_by()
+                .values_list('day', path, 'products__trash__recyclable')
+                .annotate(mass=models.Sum('products__trash__mass')))
+        model.objects.bulk_create(
+            (model(day=day, recyclable=recyclable, mass=mass, **{field: key})
+             for day, key, recyclable, mass in rows
+             if key is not None and mass is not None),
+            batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('backend', '0003_receipt_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPlaceWaste',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('recyclable', models.TextField(max_length=255)),
+                ('mass', models.BigIntegerField(default=0)),
+                ('place', models.TextField(max_length=255)),
+            ],
+            options={
+                'unique_together': {('day', 'place', 'recyclable')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyUserWaste',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('recyclable', models.TextField(max_length=255)),
+                ('mass', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('day', 'user', 'recyclable')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCompanyWaste',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('recyclable', models.TextField(max_length=255)),
+                ('mass', models.BigIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='backend.company')),
+            ],
+            options={
+                'unique_together': {('day', 'company', 'recyclable')},
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0004_dailyplacewaste_dailyuserwaste_dailycompanywaste'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['time', 'id'], name='backend_rec_time_ca2159_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_profiles(apps, schema_editor):
+    Product = apps.get_model('backend', 'Product')
+    ProductWaste = apps.get_model('backend', 'ProductWaste')
+    TrashComponent = apps.get_model('backend', 'TrashComponent')
+    rows = (TrashComponent.objects
+            .order_by()
+            .values_list('product', 'recyclable')
+            .annotate(mass=models.Sum('mass'), count=models.Count('pk')))
+    totals = {}
+    waste = []
+    for product_id, recyclable, mass, count in rows:
+        if product_id is None:
+            continue
+        total_mass, total_count = totals.get(product_id, (0, 0))
+        totals[product_id] = (total_mass + mass, total_count + count)
+        waste.append(ProductWaste(product_id=product_id, recyclable=recyclable, mass=mass))
+    ProductWaste.objects.bulk_create(waste)
+    for product_id, (mass, count) in totals.items():
+        Product.objects.filter(pk=product_id).update(trash_mass=mass, trash_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0005_receipt_backend_rec_time_ca2159_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='trash_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='trash_mass',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ProductWaste',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recyclable', models.TextField(max_length=255)),
+                ('mass', models.IntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waste', to='backend.product')),
+            ],
+            options={
+                'unique_together': {('product', 'recyclable')},
+            },
+        ),
+        migrations.RunPython(fill_profiles, migrations.RunPython.noop),
+    ]
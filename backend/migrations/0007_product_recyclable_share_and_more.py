@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:25
+
+from django.db import migrations, models
+
+
+def fill_recyclable_share(apps, schema_editor):
+    Product = apps.get_model('backend', 'Product')
+    ProductWaste = apps.get_model('backend', 'ProductWaste')
+    recyclable = (ProductWaste.objects
+                  .filter(recyclable='перерабатываем')
+                  .values_list('product', 'mass'))
+    for product_id, mass in recyclable:
+        product = Product.objects.get(pk=product_id)
+        if product.trash_mass:
+            product.recyclable_share = mass / product.trash_mass
+            product.save(update_fields=['recyclable_share'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0006_product_trash_count_product_trash_mass_productwaste'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='recyclable_share',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['type', '-recyclable_share'], name='backend_pro_type_69f260_idx'),
+        ),
+        migrations.RunPython(fill_recyclable_share, migrations.RunPython.noop),
+    ]
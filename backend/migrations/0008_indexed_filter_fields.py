@@ -0,0 +1,86 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_product_recyclable_share_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='type',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='dailycompanywaste',
+            name='recyclable',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='dailyplacewaste',
+            name='place',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='dailyplacewaste',
+            name='recyclable',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='dailyuserwaste',
+            name='recyclable',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='type',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='productwaste',
+            name='recyclable',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='receipt',
+            name='place',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='trashcomponent',
+            name='mass',
+            field=models.SmallIntegerField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='trashcomponent',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='trashcomponent',
+            name='recyclable',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['user', 'time'], name='backend_rec_user_id_4939bc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['place', 'time'], name='backend_rec_place_8d5fc2_idx'),
+        ),
+    ]
@@ -0,0 +1,132 @@
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def place_key(name):
+    return ' '.join(name.split()).casefold()
+
+
+def fill_places(apps, schema_editor):
+    Place = apps.get_model('backend', 'Place')
+    Receipt = apps.get_model('backend', 'Receipt')
+    DailyPlaceWaste = apps.get_model('backend', 'DailyPlaceWaste')
+
+    names = set(Receipt.objects.values_list('place', flat=True).distinct())
+    names |= set(DailyPlaceWaste.objects.values_list('place', flat=True).distinct())
+    # spelling variants of a place become one row named after its first variant
+    places = {}
+    for name in sorted(names):
+        places.setdefault(place_key(name), ' '.join(name.split()))
+    Place.objects.bulk_create(Place(key=key, name=name) for key, name in places.items())
+    ids = dict(Place.objects.values_list('key', 'pk'))
+
+    for name in names:
+        Receipt.objects.filter(place=name).update(place_ref=ids[place_key(name)])
+
+    # merged variants would collide on (day, place, recyclable), sum them up
+    mass = defaultdict(int)
+    for day, name, recyclable, row_mass in (DailyPlaceWaste.objects
+                                            .values_list('day', 'place', 'recyclable', 'mass')
+                                            .iterator()):
+        mass[(day, ids[place_key(name)], recyclable)] += row_mass
+    DailyPlaceWaste.objects.all().delete()
+    DailyPlaceWaste.objects.bulk_create(
+        (DailyPlaceWaste(day=day, place='', place_ref_id=place, recyclable=recyclable, mass=row_mass)
+         for (day, place, recyclable), row_mass in mass.items()),
+        batch_size=1000)
+
+
+def restore_names(apps, schema_editor):
+    Receipt = apps.get_model('backend', 'Receipt')
+    DailyPlaceWaste = apps.get_model('backend', 'DailyPlaceWaste')
+    Place = apps.get_model('backend', 'Place')
+    for pk, name in Place.objects.values_list('pk', 'name'):
+        Receipt.objects.filter(place_ref=pk).update(place=name)
+        DailyPlaceWaste.objects.filter(place_ref=pk).update(place=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_company_updated_at_product_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='backend.place')),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='receipt',
+            name='backend_rec_place_8d5fc2_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyplacewaste',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='place_ref',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='backend.place'),
+        ),
+        migrations.AddField(
+            model_name='dailyplacewaste',
+            name='place_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='backend.place'),
+        ),
+        migrations.RunPython(fill_places, restore_names),
+        # a default lets the names be re-added when migrating backwards
+        migrations.AlterField(
+            model_name='receipt',
+            name='place',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='dailyplacewaste',
+            name='place',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.RemoveField(
+            model_name='receipt',
+            name='place',
+        ),
+        migrations.RemoveField(
+            model_name='dailyplacewaste',
+            name='place',
+        ),
+        migrations.RenameField(
+            model_name='receipt',
+            old_name='place_ref',
+            new_name='place',
+        ),
+        migrations.RenameField(
+            model_name='dailyplacewaste',
+            old_name='place_ref',
+            new_name='place',
+        ),
+        migrations.AlterField(
+            model_name='receipt',
+            name='place',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='backend.place'),
+        ),
+        migrations.AlterField(
+            model_name='dailyplacewaste',
+            name='place',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='backend.place'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyplacewaste',
+            unique_together={('day', 'place', 'recyclable')},
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['place', 'time'], name='backend_rec_place_i_b40043_idx'),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:39
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+# Spellings found in the free text column and their category
+CODES = {
+    'нет': 0, 'no': 0, 'false': 0,
+    'перерабатываем': 1, 'да': 1, 'yes': 1, 'true': 1, 'recyclable': 1,
+    'разлагается': 2, 'biodegradable': 2, 'decomposes': 2,
+    'частично': 3, 'partially': 3, 'partial': 3,
+}
+LABELS = {0: 'нет', 1: 'перерабатываем', 2: 'разлагается', 3: 'частично'}
+
+# Tables keyed by recyclable (besides the listed fields) with a summed mass
+DERIVED = {
+    'ProductWaste': ['product_id'],
+    'DailyUserWaste': ['day', 'user_id'],
+    'DailyPlaceWaste': ['day', 'place_id'],
+    'DailyCompanyWaste': ['day', 'company_id'],
+}
+
+
+def codes_of(Model):
+    labels = set(Model.objects.values_list('recyclable', flat=True).distinct())
+    unknown = {label for label in labels if label.strip().casefold() not in CODES}
+    if unknown:
+        raise ValueError('Unknown %s.recyclable values %s, add them to CODES in %s'
+                         % (Model.__name__, sorted(unknown), __name__))
+    codes = defaultdict(list)
+    for label in labels:
+        codes[CODES[label.strip().casefold()]].append(label)
+    return codes
+
+
+def to_codes(apps, schema_editor):
+    # The column is still text here, the codes are written as strings and
+    # converted by the following AlterFields
+    TrashComponent = apps.get_model('backend', 'TrashComponent')
+    for code, labels in codes_of(TrashComponent).items():
+        TrashComponent.objects.filter(recyclable__in=labels).update(recyclable=str(code))
+
+    for model_name, keys in DERIVED.items():
+        Model = apps.get_model('backend', model_name)
+        for code, labels in codes_of(Model).items():
+            rows = Model.objects.filter(recyclable__in=labels)
+            if len(labels) == 1:
+                rows.update(recyclable=str(code))
+                continue
+            # spelling variants of one category collide on the unique key
+            mass = defaultdict(int)
+            for row in rows.values(*keys, 'mass').iterator():
+                mass[tuple(row[key] for key in keys)] += row['mass']
+            rows.delete()
+            Model.objects.bulk_create(
+                (Model(recyclable=str(code), mass=row_mass, **dict(zip(keys, key)))
+                 for key, row_mass in mass.items()),
+                batch_size=1000)
+
+
+def to_labels(apps, schema_editor):
+    for model_name in ['TrashComponent', *DERIVED]:
+        Model = apps.get_model('backend', model_name)
+        for code, label in LABELS.items():
+            Model.objects.filter(recyclable=str(code)).update(recyclable=label)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0010_place'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_codes, to_labels),
+        migrations.AlterField(
+            model_name='dailycompanywaste',
+            name='recyclable',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'нет'), (1, 'перерабатываем'), (2, 'разлагается')]),
+        ),
+        migrations.AlterField(
+            model_name='dailyplacewaste',
+            name='recyclable',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'нет'), (1, 'перерабатываем'), (2, 'разлагается')]),
+        ),
+        migrations.AlterField(
+            model_name='dailyuserwaste',
+            name='recyclable',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'нет'), (1, 'перерабатываем'), (2, 'разлагается')]),
+        ),
+        migrations.AlterField(
+            model_name='productwaste',
+            name='recyclable',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'нет'), (1, 'перерабатываем'), (2, 'разлагается')]),
+        ),
+        migrations.AlterField(
+            model_name='trashcomponent',
+            name='recyclable',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'нет'), (1, 'перерабатываем'), (2, 'разлагается')], db_index=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:43
+
+import backend.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0011_recyclable_codes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='barcode',
+            field=models.CharField(blank=True, max_length=14, null=True, unique=True, validators=[backend.models.validate_gtin]),
+        ),
+    ]
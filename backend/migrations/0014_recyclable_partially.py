@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0013_reportjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailycompanywaste',
+            name='recyclable',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'нет'), (1, 'перерабатываем'), (2, 'разлагается'), (3, 'частично')]),
+        ),
+        migrations.AlterField(
+            model_name='dailyplacewaste',
+            name='recyclable',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'нет'), (1, 'перерабатываем'), (2, 'разлагается'), (3, 'частично')]),
+        ),
+        migrations.AlterField(
+            model_name='dailyuserwaste',
+            name='recyclable',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'нет'), (1, 'перерабатываем'), (2, 'разлагается'), (3, 'частично')]),
+        ),
+        migrations.AlterField(
+            model_name='productwaste',
+            name='recyclable',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'нет'), (1, 'перерабатываем'), (2, 'разлагается'), (3, 'частично')]),
+        ),
+        migrations.AlterField(
+            model_name='trashcomponent',
+            name='recyclable',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'нет'), (1, 'перерабатываем'), (2, 'разлагается'), (3, 'частично')], db_index=True),
+        ),
+    ]
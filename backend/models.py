@@ -1,30 +1,211 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 
 from django.contrib.auth.models import User
 
 # Create your models here.
+# Recyclability of a trash component, stored as a small integer and
+# rendered by its label in the API
+class Recyclable(models.IntegerChoices):
+    NO = 0, 'нет'
+    YES = 1, 'перерабатываем'
+    DECOMPOSES = 2, 'разлагается'
+    # made of recyclable and non recyclable parts, not counted as recyclable
+    PARTIALLY = 3, 'частично'
+
+    @classmethod
+    def parse(cls, value):
+        """The category of a label (ignoring case and surrounding spaces) or of
+        a code, None if there is no such category."""
+        value = str(value).strip().casefold()
+        for member in cls:
+            if value in (member.label, str(member.value)):
+                return member
+        return None
+
+# TrashComponent.recyclable value of components that can be recycled
+RECYCLABLE = Recyclable.YES
+
+def place_key(name):
+    """Lookup key of a place name, spelling variants that only differ in case
+    or whitespace share it."""
+    return ' '.join(name.split()).casefold()
+
+def gtin_check_digit(digits):
+    """Check digit of a GTIN given without it."""
+    total = sum(int(digit) * (3 if i % 2 == 0 else 1)
+                for i, digit in enumerate(reversed(digits)))
+    return str(-total % 10)
+
+def normalize_gtin(code):
+    """A scanned EAN-8, UPC-A, EAN-13 or GTIN-14 code as the 14 digit GTIN
+    products are stored by, None if it isn't a valid code."""
+    code = str(code).strip()
+    if (not code.isascii() or not code.isdigit() or len(code) not in (8, 12, 13, 14)
+            or gtin_check_digit(code[:-1]) != code[-1]):
+        return None
+    return code.zfill(14)
+
+def validate_gtin(value):
+    if normalize_gtin(value) != value:
+        raise ValidationError('%(value)s is not a valid 14 digit GTIN', params={'value': value})
+
+class PlaceQuerySet(models.QuerySet):
+    def resolve(self, names):
+        """Map place names to Place ids, creating the missing places."""
+        keys = {name: place_key(name) for name in names}
+        ids = dict(self.filter(key__in=set(keys.values())).values_list('key', 'pk'))
+        missing = {}
+        for name, key in keys.items():
+            if key not in ids:
+                missing.setdefault(key, ' '.join(name.split()))
+        if missing:
+            self.bulk_create([self.model(key=key, name=name) for key, name in missing.items()],
+                             ignore_conflicts=True)
+            ids.update(self.filter(key__in=list(missing)).values_list('key', 'pk'))
+        return {name: ids[key] for name, key in keys.items()}
+
+class ProductQuerySet(models.QuerySet):
+    def with_trash(self):
+        return self.prefetch_related(
+            models.Prefetch('trash', queryset=TrashComponent.objects.order_by('pk')))
+
+class ReceiptQuerySet(models.QuerySet):
+    def with_products(self):
+        return self.prefetch_related(
+            models.Prefetch('products', queryset=Product.objects.with_trash().order_by('pk')))
+
 class Company(models.Model):
-    name    = models.TextField(max_length=255)
-    type    = models.TextField(max_length=255)
+    name    = models.CharField(max_length=255, db_index=True)
+    type    = models.CharField(max_length=255, db_index=True)
+    updated_at  = models.DateTimeField(auto_now=True, db_index=True)
 
 class TrashComponent(models.Model):
-	name        = models.TextField(max_length=255)
-	recyclable  = models.TextField(max_length=255)
-	mass        = models.SmallIntegerField()
+	name        = models.CharField(max_length=255, db_index=True)
+	recyclable  = models.PositiveSmallIntegerField(choices=Recyclable.choices, db_index=True)
+	mass        = models.SmallIntegerField(db_index=True)
+	updated_at  = models.DateTimeField(auto_now=True, db_index=True)
 
 class Product(models.Model):
-	name    = models.TextField(max_length=255)
+	name    = models.CharField(max_length=255, db_index=True)
+	# GTIN-14, shorter codes are zero padded, see normalize_gtin
+	barcode = models.CharField(max_length=14, unique=True, null=True, blank=True,
+	                           validators=[validate_gtin])
 	company = models.ForeignKey(Company, on_delete=models.CASCADE)
-	type    = models.TextField(max_length=255)      
+	type    = models.CharField(max_length=255)      
             # для того, чтобы можно было посоветовать более 
             # перерабатываемые альтернативы, типа если это молоко,
             # то ищем другие продукты вида "молоко", у которых больше
             # перерабатываемость
 	trash   = models.ManyToManyField(TrashComponent)
+	# denormalized from `trash` by backend.profiles
+	trash_mass  = models.IntegerField(default=0)
+	trash_count = models.PositiveSmallIntegerField(default=0)
+	# share of trash_mass that is RECYCLABLE, products of one type are
+	# ranked by it when looking for alternatives
+	recyclable_share = models.FloatField(default=0)
+	# also bumped when `trash` or one of its components changes
+	updated_at  = models.DateTimeField(auto_now=True, db_index=True)
+
+	objects = ProductQuerySet.as_manager()
+
+	class Meta:
+		indexes = [
+			# also serves plain `type` filters
+			models.Index(fields=['type', '-recyclable_share']),
+		]
+
+# Packaging mass of a product per recyclability class, see backend.profiles
+class ProductWaste(models.Model):
+    product     = models.ForeignKey(Product, on_delete=models.CASCADE,
+                                    related_name='waste')
+    recyclable  = models.PositiveSmallIntegerField(choices=Recyclable.choices)
+    mass        = models.IntegerField()
+
+    class Meta:
+        unique_together = [('product', 'recyclable')]
+
+# A shop or a region, places of a region point to it with `parent`
+class Place(models.Model):
+    name        = models.CharField(max_length=255)
+    key         = models.CharField(max_length=255, unique=True)
+    parent      = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='children')
+
+    objects     = PlaceQuerySet.as_manager()
+
+    def __str__(self):
+        return self.name
 
 class Receipt(models.Model):
     products    = models.ManyToManyField(Product)
     time        = models.DateTimeField()
-    place       = models.TextField(max_length=255)
+    # indexed by (place, time) below
+    place       = models.ForeignKey(Place, on_delete=models.PROTECT, db_index=False)
     user        = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     # user        = models.ForeignKey(User, on_delete=models.SET_NULL)
+    # also bumped when `products` changes
+    updated_at  = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects     = ReceiptQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['time', 'id']),
+            models.Index(fields=['user', 'time']),
+            models.Index(fields=['place', 'time']),
+        ]
+
+
+# Pre-aggregated waste mass per day and recyclability class, kept up to date
+# by backend.signals and rebuilt with `manage.py rebuild_rollups`
+class DailyWaste(models.Model):
+    day         = models.DateField()
+    recyclable  = models.PositiveSmallIntegerField(choices=Recyclable.choices)
+    mass        = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+class DailyUserWaste(DailyWaste):
+    user        = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = [('day', 'user', 'recyclable')]
+
+class DailyPlaceWaste(DailyWaste):
+    place       = models.ForeignKey(Place, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = [('day', 'place', 'recyclable')]
+
+class DailyCompanyWaste(DailyWaste):
+    company     = models.ForeignKey(Company, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = [('day', 'company', 'recyclable')]
+
+
+class ReportKind(models.TextChoices):
+    STATS       = 'stats'
+    TIMESERIES  = 'timeseries'
+    EXPORT      = 'export'
+
+class ReportStatus(models.TextChoices):
+    PENDING     = 'pending'
+    RUNNING     = 'running'
+    DONE        = 'done'
+    FAILED      = 'failed'
+
+# A report computed in the background by backend.reports, the result is a
+# file in settings.REPORTS_DIR. `params` are the receipt filters and the
+# options of the report, as query parameter strings
+class ReportJob(models.Model):
+    user        = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind        = models.CharField(max_length=16, choices=ReportKind.choices)
+    params      = models.JSONField(default=dict, blank=True)
+    status      = models.CharField(max_length=16, choices=ReportStatus.choices,
+                                   default=ReportStatus.PENDING)
+    error       = models.TextField(blank=True)
+    created_at  = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,51 @@
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework.response import Response
+
+
+def parse_ids(value):
+    """Ids of a comma separated `pk` query parameter, None if one of them
+    isn't a number."""
+    ids = value.split(',')
+    if not all(pk.isdigit() for pk in ids):
+        return None
+    return [int(pk) for pk in ids]
+
+
+class MultiGetMixin:
+    """Fetch many objects of a viewset at once, with `?pk=1,2,3` on the GET
+    or a {"pk": [1, 2, 3]} POST body on `batch`.
+
+    The objects come from one `pk IN` read and are returned in the requested
+    order along with the ids that don't exist.
+    """
+    multiget_max_size = 100
+
+    def multiget_data(self, pks):
+        """Serialized data of the existing objects among `pks` as a {pk: data}."""
+        objects = list(self.get_queryset().filter(pk__in=pks))
+        return dict(zip((obj.pk for obj in objects),
+                        self.get_serializer(objects, many=True).data))
+
+    def multiget(self, pks):
+        if len(pks) > self.multiget_max_size:
+            return Response('No more than %d ids per request' % self.multiget_max_size,
+                            status=400)
+        pks = list(dict.fromkeys(pks))
+        data = self.multiget_data(pks)
+        return Response({'results': [data[pk] for pk in pks if pk in data],
+                         'missing': [pk for pk in pks if pk not in data]})
+
+    @swagger_auto_schema(responses={200: 'Found objects in the requested order and the missing ids',
+                                    400: 'Not a list of ids or too many ids'},
+                         request_body=openapi.Schema(
+                             type=openapi.TYPE_OBJECT, required=['pk'],
+                             properties={'pk': openapi.Schema(
+                                 type=openapi.TYPE_ARRAY,
+                                 items=openapi.Schema(type=openapi.TYPE_INTEGER))}))
+    def batch(self, request):
+        pks = request.data.get('pk') if isinstance(request.data, dict) else None
+        if (not isinstance(pks, list) or not pks
+                or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in pks)):
+            return Response("Expected a non-empty list of ids in 'pk'", status=400)
+        return self.multiget(pks)
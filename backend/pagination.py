@@ -0,0 +1,97 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class TimeCursorPagination(BasePagination):
+    """Keyset pagination over (time, pk).
+
+    Every page is a single indexed range scan limited to `page_size + 1`
+    rows, there is no COUNT(*) and no OFFSET, so deep pages cost the same as
+    the first one. Cursors are opaque to the client.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            time, pk, reverse = None, None, False
+            queryset = queryset.order_by('time', 'pk')
+        else:
+            time, pk, reverse = cursor
+            if reverse:
+                queryset = (queryset
+                            .filter(Q(time__lt=time) | Q(time=time, pk__lt=pk))
+                            .order_by('-time', '-pk'))
+            else:
+                queryset = (queryset
+                            .filter(Q(time__gt=time) | Q(time=time, pk__gt=pk))
+                            .order_by('time', 'pk'))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, item, reverse):
+        if isinstance(item, dict):
+            time, pk = item['time'], item['pk']
+        else:
+            time, pk = item.time, item.pk
+        position = [time.isoformat(), pk, reverse]
+        token = urlsafe_b64encode(json.dumps(position).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            time, pk, reverse = json.loads(urlsafe_b64decode(token.encode()))
+            return datetime.fromisoformat(time), int(pk), bool(reverse)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
@@ -17,9 +17,9 @@ class IsOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method == 'GET':
             return True
-        if not obj.user:
+        if not obj.user_id:
             return False
-        if request.user.id == obj.user.id:
+        if request.user.id == obj.user_id:
             return True
         return False
 
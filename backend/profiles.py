@@ -0,0 +1,50 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from backend import models, rollups
+
+
+def refresh_products(product_ids):
+    """Recompute the denormalized waste profile (trash_mass, trash_count,
+    recyclable_share and ProductWaste rows) of the given products from their
+    trash components. Also bumps their updated_at and moves the daily
+    rollups of the receipts holding them to the new profile."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    rows = (models.TrashComponent.objects
+            .filter(product__in=product_ids)
+            .order_by()
+            .values_list('product', 'recyclable')
+            .annotate(mass=Sum('mass'), count=Count('pk')))
+    mass = defaultdict(int)
+    count = defaultdict(int)
+    recyclable_mass = defaultdict(int)
+    waste = []
+    for product_id, recyclable, class_mass, class_count in rows:
+        mass[product_id] += class_mass
+        count[product_id] += class_count
+        if recyclable == models.RECYCLABLE:
+            recyclable_mass[product_id] += class_mass
+        waste.append(models.ProductWaste(product_id=product_id,
+                                         recyclable=recyclable, mass=class_mass))
+    now = timezone.now()
+    with transaction.atomic():
+        receipts = rollups.receipts_of(product_ids)
+        old_rows = rollups.receipt_rows(receipts)
+        models.ProductWaste.objects.filter(product__in=product_ids).delete()
+        models.ProductWaste.objects.bulk_create(waste)
+        models.Product.objects.bulk_update(
+            [models.Product(pk=pk, trash_mass=mass[pk], trash_count=count[pk],
+                            recyclable_share=recyclable_share(recyclable_mass[pk], mass[pk]),
+                            updated_at=now)
+             for pk in product_ids],
+            ['trash_mass', 'trash_count', 'recyclable_share', 'updated_at'])
+        rollups.apply_change(old_rows, rollups.receipt_rows(receipts))
+
+
+def recyclable_share(recyclable_mass, mass):
+    return recyclable_mass / mass if mass else 0.0
@@ -0,0 +1,151 @@
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from backend import export, models, routers
+from backend.filters import ReceiptFilter
+from backend.stats import (waste_statistics, waste_timeseries,
+                           TIMESERIES_BUCKETS, TIMESERIES_GROUPS)
+
+
+# Reports too slow for a request (statistics, time series or an export of
+# many receipts) run as ReportJobs on a pool of settings.REPORT_WORKERS
+# processes. A worker writes the result to settings.REPORTS_DIR and the
+# client polls the job until it can download it.
+
+logger = logging.getLogger('backend.reports')
+
+# every report takes the filters of the receipt list
+FILTER_PARAMS = list(ReceiptFilter.base_filters)
+
+# kind -> its own parameters
+KIND_PARAMS = {
+    models.ReportKind.STATS: [],
+    models.ReportKind.TIMESERIES: ['bucket', 'group_by'],
+    models.ReportKind.EXPORT: ['output'],
+}
+
+CONTENT_TYPES = dict(export.CONTENT_TYPES, json='application/json')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def clean_params(kind, params):
+    """Parameters of a `kind` report as strings, raises ValueError when one
+    of them is unknown or invalid."""
+    if not isinstance(params, dict):
+        raise ValueError('Expected an object of query parameters')
+    unknown = sorted(set(params) - set(FILTER_PARAMS) - set(KIND_PARAMS[kind]))
+    if unknown:
+        raise ValueError('Unknown parameters: %s' % ', '.join(unknown))
+    params = {name: str(value) for name, value in params.items()
+              if value is not None and value != ''}
+    filterset = ReceiptFilter(params, queryset=models.Receipt.objects.none())
+    if not filterset.is_valid():
+        raise ValueError('; '.join('%s: %s' % (name, ' '.join(errors))
+                                   for name, errors in filterset.errors.items()))
+    if params.get('bucket', 'day') not in TIMESERIES_BUCKETS:
+        raise ValueError("'bucket' must be one of: %s" % ', '.join(TIMESERIES_BUCKETS))
+    if params.get('group_by', 'place') not in TIMESERIES_GROUPS:
+        raise ValueError("'group_by' must be one of: %s" % ', '.join(TIMESERIES_GROUPS))
+    if params.get('output', 'ndjson') not in export.CONTENT_TYPES:
+        raise ValueError("'output' must be one of: %s" % ', '.join(export.CONTENT_TYPES))
+    return params
+
+
+def result_format(job):
+    if job.kind == models.ReportKind.EXPORT:
+        return job.params.get('output', 'ndjson')
+    return 'json'
+
+
+def result_name(job):
+    return 'report-%d.%s' % (job.pk, result_format(job))
+
+
+def result_path(job):
+    return os.path.join(settings.REPORTS_DIR, result_name(job))
+
+
+def write(job, file):
+    receipts = ReceiptFilter(job.params, queryset=models.Receipt.objects.all()).qs
+    if job.kind == models.ReportKind.STATS:
+        statistics, cum_mass = waste_statistics(receipts)
+        json.dump({'stats': statistics, 'cum_mass': cum_mass}, file, ensure_ascii=False)
+    elif job.kind == models.ReportKind.TIMESERIES:
+        series = waste_timeseries(receipts, job.params.get('bucket', 'day'),
+                                  job.params.get('group_by'))
+        json.dump(series, file, cls=DjangoJSONEncoder, ensure_ascii=False)
+    else:
+        file.writelines(export.stream(export.receipt_rows(receipts), result_format(job)))
+
+
+def run(pk):
+    """Compute the report of a pending job, a job that isn't pending any
+    more is left alone."""
+    taken = (models.ReportJob.objects
+             .filter(pk=pk, status=models.ReportStatus.PENDING)
+             .update(status=models.ReportStatus.RUNNING))
+    if not taken:
+        return
+    job = models.ReportJob.objects.get(pk=pk)
+    path = result_path(job)
+    # the report only reads, it may use a replica
+    token = routers.reads_from_replica.set(True)
+    try:
+        os.makedirs(settings.REPORTS_DIR, exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8', newline='') as file:
+            write(job, file)
+        os.replace(path + '.tmp', path)
+    except Exception as e:
+        logger.exception('Report %d failed', pk)
+        if os.path.exists(path + '.tmp'):
+            os.remove(path + '.tmp')
+        job.status, job.error = models.ReportStatus.FAILED, str(e) or type(e).__name__
+    else:
+        job.status = models.ReportStatus.DONE
+    finally:
+        routers.reads_from_replica.reset(token)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+
+
+def work(pk):
+    # a worker runs many jobs, like a request it shouldn't keep a broken
+    # or expired connection from one to the next
+    close_old_connections()
+    try:
+        run(pk)
+    finally:
+        close_old_connections()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawned rather than forked, the workers don't inherit the
+            # server's database connections and threads
+            _executor = ProcessPoolExecutor(max_workers=settings.REPORT_WORKERS,
+                                            mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=django.setup)
+    return _executor
+
+
+def submit(job):
+    """Run the job once the transaction that created it commits, in the
+    worker pool or right away when settings.REPORT_WORKERS is 0."""
+    if settings.REPORT_WORKERS:
+        transaction.on_commit(lambda: executor().submit(work, job.pk))
+    else:
+        transaction.on_commit(lambda: run(job.pk))
@@ -0,0 +1,143 @@
+import contextvars
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+from backend import models
+
+
+# (rollup model, key field on the rollup, path to the key from Receipt)
+ROLLUPS = (
+    (models.DailyUserWaste, 'user', 'user'),
+    (models.DailyPlaceWaste, 'place', 'place'),
+    (models.DailyCompanyWaste, 'company', 'products__company'),
+)
+
+
+# Receipts whose products are being deleted and their rows from before,
+# see hold() and release()
+_held = contextvars.ContextVar('rollups_held', default=None)
+
+
+def receipts_of(product_ids):
+    """Ids of the receipts holding any of the given products."""
+    return list(models.Receipt.objects
+                .filter(products__in=product_ids)
+                .order_by()
+                .values_list('pk', flat=True)
+                .distinct())
+
+
+def receipt_rows(receipts):
+    """Waste of the given receipts grouped by
+    (day, place, user, company, recyclable), as a list of tuples ending
+    with the summed mass."""
+    return list(models.Receipt.objects
+                .filter(pk__in=receipts)
+                .annotate(day=TruncDate('time'))
+                .order_by()
+                .values_list('day', 'place', 'user', 'products__company',
+                             'products__waste__recyclable')
+                .annotate(mass=Sum('products__waste__mass')))
+
+
+def _fold(rows, sign, deltas):
+    for day, place, user, company, recyclable, mass in rows:
+        if mass is None:
+            continue
+        for model, key in ((models.DailyUserWaste, user),
+                           (models.DailyPlaceWaste, place),
+                           (models.DailyCompanyWaste, company)):
+            if key is not None:
+                deltas[model][(day, key, recyclable)] += sign * mass
+
+
+def _apply(model, field, changes):
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if not changes:
+        return
+    attname = model._meta.get_field(field).attname
+    existing = model.objects.select_for_update().filter(**{
+        'day__in': {day for day, _, _ in changes},
+        attname + '__in': {key for _, key, _ in changes},
+        'recyclable__in': {recyclable for _, _, recyclable in changes},
+    })
+    existing = {(row.day, getattr(row, attname), row.recyclable): row
+                for row in existing}
+    to_update, to_create = [], []
+    for (day, key, recyclable), delta in changes.items():
+        row = existing.get((day, key, recyclable))
+        if row is None:
+            to_create.append(model(day=day, recyclable=recyclable, mass=delta,
+                                   **{attname: key}))
+        else:
+            row.mass += delta
+            to_update.append(row)
+    model.objects.bulk_update(to_update, ['mass'])
+    model.objects.bulk_create(to_create)
+
+
+def apply_change(old_rows, new_rows):
+    """Move the rollups from the state described by `old_rows` to the one
+    described by `new_rows` (both as returned by `receipt_rows`)."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    _fold(old_rows, -1, deltas)
+    _fold(new_rows, 1, deltas)
+    with transaction.atomic():
+        for model, field, _ in ROLLUPS:
+            _apply(model, field, deltas[model])
+
+
+def hold(receipts, companies=()):
+    """Snapshot the rows of receipts that a delete is about to take products
+    from, `companies` are deleted along with them. A cascade sends every
+    pre_delete before deleting anything, so receipts already held are only
+    counted once."""
+    held = _held.get()
+    if held is None:
+        held = (set(), [], set())
+        _held.set(held)
+    receipts = [pk for pk in receipts if pk not in held[0]]
+    held[0].update(receipts)
+    held[1].extend(receipt_rows(receipts))
+    held[2].update(companies)
+
+
+def release():
+    """Apply the change to the held receipts, at the first post_delete of
+    the delete. The rollup rows of deleted companies go with them, so their
+    share of the old rows is dropped."""
+    held = _held.get()
+    if held is None:
+        return
+    _held.set(None)
+    receipts, old_rows, deleted = held
+    companies = {row[3] for row in old_rows if row[3] is not None}
+    deleted |= companies - set(models.Company.objects.filter(pk__in=companies)
+                                                     .values_list('pk', flat=True))
+    old_rows = [row[:3] + (None,) + row[4:] if row[3] in deleted else row
+                for row in old_rows]
+    apply_change(old_rows, receipt_rows(receipts))
+
+
+def add_receipts(receipts):
+    apply_change([], receipt_rows(receipts))
+
+
+def rebuild():
+    with transaction.atomic():
+        for model, field, path in ROLLUPS:
+            attname = model._meta.get_field(field).attname
+            rows = (models.Receipt.objects
+                    .annotate(day=TruncDate('time'))
+                    .order_by()
+                    .values_list('day', path, 'products__waste__recyclable')
+                    .annotate(mass=Sum('products__waste__mass')))
+            model.objects.all().delete()
+            model.objects.bulk_create(
+                (model(day=day, recyclable=recyclable, mass=mass, **{attname: key})
+                 for day, key, recyclable, mass in rows
+                 if key is not None and mass is not None),
+                batch_size=1000)
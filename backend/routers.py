@@ -0,0 +1,49 @@
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+
+
+# Whether reads of the current request may go to a replica, set by
+# ReplicaMiddleware and cleared by the first write of the request
+reads_from_replica = contextvars.ContextVar('reads_from_replica', default=False)
+
+# Whether the current request wrote to the primary, set by the router and
+# read by ReplicaMiddleware to pin the client to the primary
+wrote_primary = contextvars.ContextVar('wrote_primary', default=False)
+
+
+@contextlib.contextmanager
+def primary():
+    """Read the primary inside the block. For reads whose result outlives the
+    request in a cache, a lagging replica would keep serving stale data
+    after the write that bumped the cache version."""
+    token = reads_from_replica.set(False)
+    try:
+        yield
+    finally:
+        reads_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads to one of settings.READ_REPLICAS while the request allows
+    it and everything else to the primary `default` database."""
+
+    def db_for_read(self, model, **hints):
+        if settings.READ_REPLICAS and reads_from_replica.get():
+            return random.choice(settings.READ_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        # read your own writes: the rest of the request reads the primary
+        reads_from_replica.set(False)
+        wrote_primary.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get the schema from the primary
+        return db not in settings.READ_REPLICAS
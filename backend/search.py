@@ -0,0 +1,99 @@
+import re
+
+from django.db import connections, router
+
+from backend import models
+
+
+# Product name search. On SQLite the names are indexed by an FTS5 table
+# that triggers keep in sync with backend_product, other databases (or an
+# SQLite built without FTS5) fall back to a name prefix match.
+
+TABLE = 'backend_product_fts'
+
+TRIGGERS = {
+    'backend_product_fts_insert': """
+        CREATE TRIGGER IF NOT EXISTS backend_product_fts_insert
+        AFTER INSERT ON backend_product BEGIN
+            INSERT INTO backend_product_fts(rowid, name) VALUES (new.id, new.name);
+        END""",
+    'backend_product_fts_delete': """
+        CREATE TRIGGER IF NOT EXISTS backend_product_fts_delete
+        AFTER DELETE ON backend_product BEGIN
+            INSERT INTO backend_product_fts(backend_product_fts, rowid, name)
+            VALUES ('delete', old.id, old.name);
+        END""",
+    'backend_product_fts_update': """
+        CREATE TRIGGER IF NOT EXISTS backend_product_fts_update
+        AFTER UPDATE OF name ON backend_product BEGIN
+            INSERT INTO backend_product_fts(backend_product_fts, rowid, name)
+            VALUES ('delete', old.id, old.name);
+            INSERT INTO backend_product_fts(rowid, name) VALUES (new.id, new.name);
+        END""",
+}
+
+_words = re.compile(r'\w+')
+
+# database alias -> whether it supports FTS5
+_available = {}
+
+
+def available(connection):
+    if connection.alias not in _available:
+        supported = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA compile_options')
+                supported = ('ENABLE_FTS5',) in cursor.fetchall()
+        _available[connection.alias] = supported
+    return _available[connection.alias]
+
+
+def install(using='default'):
+    """Create the FTS5 table and its triggers if they are missing and then
+    rebuild the index from backend_product. Safe to call after every
+    migration: rebuilding backend_product drops its triggers on SQLite."""
+    connection = connections[using]
+    if not available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = %s OR name IN (%s, %s, %s)",
+                       [TABLE, *TRIGGERS])
+        existing = {name for name, in cursor.fetchall()}
+        if existing == {TABLE, *TRIGGERS}:
+            return
+        # prefix indexes make the 2 and 3 character autocomplete prefixes cheap
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS backend_product_fts USING fts5("
+                       "name, content='backend_product', content_rowid='id', "
+                       "tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+        for sql in TRIGGERS.values():
+            cursor.execute(sql)
+        cursor.execute("INSERT INTO backend_product_fts(backend_product_fts) VALUES ('rebuild')")
+
+
+def match_query(text):
+    """FTS5 query matching names with words starting with every word of
+    `text`, or None when there are no words."""
+    words = _words.findall(text)
+    if not words:
+        return None
+    return ' '.join('"%s"*' % word for word in words)
+
+
+def products(text, limit, using=None):
+    """Ids of at most `limit` products whose name matches `text`, best
+    matches first."""
+    connection = connections[using or router.db_for_read(models.Product)]
+    if available(connection):
+        query = match_query(text)
+        if query is None:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT rowid FROM backend_product_fts "
+                           "WHERE backend_product_fts MATCH %s ORDER BY rank, rowid LIMIT %s",
+                           [query, limit])
+            return [pk for pk, in cursor.fetchall()]
+    return list(models.Product.objects
+                .filter(name__istartswith=text.strip())
+                .order_by('name', 'pk')
+                .values_list('pk', flat=True)[:limit])
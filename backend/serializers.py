@@ -1,7 +1,8 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 
-from backend import models
+from backend import models, reports
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -26,44 +27,142 @@ class CompanyPutSerializer(serializers.ModelSerializer):
         fields = ['pk', 'name', 'type']
 
 
+class RecyclableField(serializers.ChoiceField):
+    """Recyclability by its label, stored as a models.Recyclable code"""
+    def __init__(self, **kwargs):
+        super().__init__(choices=models.Recyclable.labels, **kwargs)
+
+    def to_representation(self, value):
+        # codes of the model, labels of the choices in the API schema
+        return models.Recyclable.parse(value).label
+
+    def to_internal_value(self, data):
+        recyclable = models.Recyclable.parse(data)
+        if recyclable is None:
+            self.fail('invalid_choice', input=data)
+        return recyclable
+
+
 class TrashComponentSerializer(serializers.ModelSerializer):
+    recyclable = RecyclableField()
     class Meta:
         model = models.TrashComponent
         fields = ['name', 'recyclable', 'mass', 'pk']
 class TrashComponentPutSerializer(serializers.ModelSerializer):
     pk = serializers.IntegerField(required=True)
+    recyclable = RecyclableField()
     class Meta:
         model = models.TrashComponent
         fields = ['pk', 'name', 'recyclable', 'mass']
 
 
+class BarcodeField(serializers.CharField):
+    """Product barcode, scanned EAN-8, UPC-A, EAN-13 and GTIN-14 codes are
+    stored as the zero padded GTIN-14"""
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_length', 14)
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('allow_null', True)
+        kwargs.setdefault('validators', [UniqueValidator(queryset=models.Product.objects.all())])
+        super().__init__(**kwargs)
+
+    def run_validation(self, data=serializers.empty):
+        # no barcode is stored as NULL, the column is unique
+        if isinstance(data, str) and not data.strip():
+            data = None
+        return super().run_validation(data)
+
+    def to_internal_value(self, data):
+        code = super().to_internal_value(data)
+        barcode = models.normalize_gtin(code)
+        if barcode is None:
+            raise serializers.ValidationError('"%s" is not a valid EAN/UPC barcode.' % code)
+        return barcode
+
+
 class ProductGetSerializer(serializers.ModelSerializer):
     trash_set = TrashComponentSerializer(source='trash', many=True)
+    barcode = BarcodeField()
     class Meta:
         model = models.Product
-        fields = ['name', 'company', 'type', 'trash_set', 'pk']
+        fields = ['name', 'barcode', 'company', 'type', 'trash_set', 'trash_mass',
+                  'trash_count', 'recyclable_share', 'pk']
+        read_only_fields = ['trash_mass', 'trash_count', 'recyclable_share']
 class ProductSerializer(serializers.ModelSerializer):
+    barcode = BarcodeField()
     class Meta:
         model = models.Product
-        fields = ['name', 'company', 'type', 'trash', 'pk']
+        fields = ['name', 'barcode', 'company', 'type', 'trash', 'pk']
 class ProductPutSerializer(serializers.ModelSerializer):
     pk = serializers.IntegerField(required=True)
+    barcode = BarcodeField()
     class Meta:
         model = models.Product
-        fields = ['pk', 'name', 'company', 'type', 'trash']
+        fields = ['pk', 'name', 'barcode', 'company', 'type', 'trash']
+
+
+class PlaceField(serializers.CharField):
+    """A receipt place by name. Validates to the name, PlaceSerializerMixin
+    turns it into a Place (creating unknown ones) when saving"""
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_length', 255)
+        super().__init__(**kwargs)
 
+    def to_representation(self, value):
+        return value.name
 
-class ReceiptSerializer(serializers.ModelSerializer):
+
+class PlaceSerializerMixin:
+    """Resolve the `place` name of valid data to a Place only when saving, so
+    that rejected requests don't create places"""
+    def resolve_place(self, validated_data):
+        if 'place' in validated_data:
+            name = validated_data.pop('place')
+            validated_data['place_id'] = models.Place.objects.resolve([name])[name]
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self.resolve_place(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self.resolve_place(validated_data))
+
+
+class ReceiptSerializer(PlaceSerializerMixin, serializers.ModelSerializer):
+    place = PlaceField()
     class Meta:
         model = models.Receipt
         fields = ['products', 'time', 'place', 'pk']
-class ReceiptGetSerializer(serializers.ModelSerializer):
+class ReceiptGetSerializer(PlaceSerializerMixin, serializers.ModelSerializer):
     products_set = ProductGetSerializer(source='products', many=True)
+    place = PlaceField()
     class Meta:
         model = models.Receipt
         fields = ['products_set', 'time', 'place', 'pk', 'user']
-class ReceiptPutSerializer(serializers.ModelSerializer):
+class ReceiptPutSerializer(PlaceSerializerMixin, serializers.ModelSerializer):
     pk = serializers.IntegerField(required=True)
+    place = PlaceField()
     class Meta:
         model = models.Receipt
         fields = ['pk', 'products', 'time', 'place']
+class ReceiptBulkItemSerializer(serializers.Serializer):
+    # Product ids are checked for the whole batch at once by the view
+    products = serializers.ListField(child=serializers.IntegerField(min_value=1),
+                                     allow_empty=False)
+    time = serializers.DateTimeField()
+    # Place names are resolved for the whole batch at once by the view
+    place = serializers.CharField(max_length=255)
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.ReportJob
+        fields = ['pk', 'kind', 'params', 'status', 'error', 'created_at', 'finished_at']
+        read_only_fields = ['status', 'error', 'created_at', 'finished_at']
+
+    def validate(self, data):
+        try:
+            data['params'] = reports.clean_params(data['kind'], data.get('params', {}))
+        except ValueError as e:
+            raise serializers.ValidationError({'params': str(e)})
+        return data
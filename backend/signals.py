@@ -0,0 +1,133 @@
+from django.db.models.signals import (pre_save, post_save, pre_delete,
+            post_delete, m2m_changed, post_migrate)
+from django.contrib.auth.models import User
+from django.dispatch import receiver
+from django.utils import timezone
+
+from backend import models, rollups, profiles, cache, authentication, search
+
+
+@receiver(pre_save, sender=models.Receipt)
+def receipt_pre_save(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        instance._rollup_rows = []
+        return
+    instance._rollup_rows = rollups.receipt_rows([instance.pk])
+
+@receiver(post_save, sender=models.Receipt)
+def receipt_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_rows = getattr(instance, '_rollup_rows', [])
+    rollups.apply_change(old_rows, rollups.receipt_rows([instance.pk]))
+
+@receiver(pre_delete, sender=models.Receipt)
+def receipt_pre_delete(sender, instance, **kwargs):
+    instance._rollup_rows = rollups.receipt_rows([instance.pk])
+
+@receiver(post_delete, sender=models.Receipt)
+def receipt_post_delete(sender, instance, **kwargs):
+    rollups.apply_change(getattr(instance, '_rollup_rows', []), [])
+
+@receiver(m2m_changed, sender=models.Receipt.products.through)
+def receipt_products_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith('pre_'):
+        if not reverse:
+            receipts = [instance.pk]
+        elif action == 'pre_clear':
+            receipts = list(instance.receipt_set.values_list('pk', flat=True))
+        else:
+            receipts = list(pk_set)
+        instance._rollup_receipts = receipts
+        instance._rollup_rows = rollups.receipt_rows(receipts)
+    else:
+        receipts = getattr(instance, '_rollup_receipts', [])
+        rollups.apply_change(getattr(instance, '_rollup_rows', []),
+                             rollups.receipt_rows(receipts))
+        models.Receipt.objects.filter(pk__in=receipts).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=models.Product)
+def product_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._rollup_receipts = []
+    if raw or instance.pk is None or (update_fields is not None
+                                      and 'company' not in update_fields):
+        return
+    company = (models.Product.objects.filter(pk=instance.pk)
+               .values_list('company_id', flat=True).first())
+    if company is not None and company != instance.company_id:
+        instance._rollup_receipts = rollups.receipts_of([instance.pk])
+        instance._rollup_rows = rollups.receipt_rows(instance._rollup_receipts)
+
+@receiver(post_save, sender=models.Product)
+def product_post_save(sender, instance, raw=False, **kwargs):
+    receipts = getattr(instance, '_rollup_receipts', [])
+    if receipts:
+        rollups.apply_change(instance._rollup_rows, rollups.receipt_rows(receipts))
+
+# Deleting products (directly or with their company) drops their
+# Receipt.products rows without an m2m_changed
+@receiver(pre_delete, sender=models.Product)
+def product_pre_delete(sender, instance, **kwargs):
+    rollups.hold(rollups.receipts_of([instance.pk]))
+
+@receiver(pre_delete, sender=models.Company)
+def company_pre_delete(sender, instance, **kwargs):
+    rollups.hold(rollups.receipts_of(instance.product_set.values('pk')), [instance.pk])
+
+@receiver(post_delete, sender=models.Product)
+@receiver(post_delete, sender=models.Company)
+def catalogue_post_delete(sender, instance, **kwargs):
+    rollups.release()
+
+
+@receiver(m2m_changed, sender=models.Product.trash.through)
+def product_trash_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            profiles.refresh_products([instance.pk])
+    elif action == 'pre_clear':
+        instance._profile_products = list(instance.product_set.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        profiles.refresh_products(getattr(instance, '_profile_products', []))
+    elif action.startswith('post_'):
+        profiles.refresh_products(pk_set)
+
+@receiver(post_save, sender=models.TrashComponent)
+def trash_component_post_save(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    profiles.refresh_products(instance.product_set.values_list('pk', flat=True))
+
+@receiver(pre_delete, sender=models.TrashComponent)
+def trash_component_pre_delete(sender, instance, **kwargs):
+    instance._profile_products = list(instance.product_set.values_list('pk', flat=True))
+
+@receiver(post_delete, sender=models.TrashComponent)
+def trash_component_post_delete(sender, instance, **kwargs):
+    profiles.refresh_products(getattr(instance, '_profile_products', []))
+
+
+# Catalogue responses cached by backend.cache depend on these models
+@receiver(post_save)
+@receiver(post_delete)
+def catalogue_changed(sender, raw=False, **kwargs):
+    if sender in (models.Company, models.TrashComponent, models.Product):
+        cache.bump_version(sender)
+
+@receiver(m2m_changed, sender=models.Product.trash.through)
+def catalogue_trash_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        cache.bump_version(models.Product)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    authentication.forget_user(instance.pk)
+
+
+@receiver(post_migrate)
+def search_index(sender, using='default', **kwargs):
+    if sender.name == 'backend':
+        search.install(using)
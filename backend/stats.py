@@ -0,0 +1,97 @@
+from django.db.models import Case, DateField, F, FloatField, Sum, When
+from django.db.models.functions import Cast, Trunc
+
+from backend import models
+
+
+def statistics_query(receipts):
+    # One grouped aggregate over Receipt -> products -> ProductWaste. The
+    # receipts are passed as a pk subquery so that filters on `products` don't
+    # narrow down the joined product rows we are summing over.
+    return (models.ProductWaste.objects
+            .filter(product__receipt__in=receipts.values('pk'))
+            .order_by()
+            .values_list('recyclable')
+            .annotate(mass=Sum('mass')))
+
+
+def waste_statistics(receipts):
+    # grouped by the Recyclable code, reported by label
+    labels = dict(models.Recyclable.choices)
+    statistics = {labels[recyclable]: mass for recyclable, mass in statistics_query(receipts)}
+    return statistics, sum(statistics.values())
+
+
+TIMESERIES_BUCKETS = ['day', 'week', 'month']
+
+# group_by value -> path from Receipt
+TIMESERIES_GROUPS = {
+    'place': 'place',
+    'region': 'place__parent',
+    'user': 'user',
+    'company': 'products__company',
+}
+
+
+def waste_timeseries(receipts, bucket, group_by=None):
+    """Waste mass of the receipts per time bucket, recyclable class and
+    optionally group, computed by a single grouped query.
+
+    The result is column oriented: the n-th entry of every list describes
+    the same row.
+    """
+    fields = ['bucket', 'products__waste__recyclable']
+    if group_by:
+        fields.insert(1, TIMESERIES_GROUPS[group_by])
+    rows = (models.Receipt.objects
+            .filter(pk__in=receipts.values('pk'))
+            .annotate(bucket=Trunc('time', bucket, output_field=DateField()))
+            .order_by()
+            .values_list(*fields)
+            .annotate(mass=Sum('products__waste__mass'))
+            .order_by(*fields))
+    labels = dict(models.Recyclable.choices)
+    columns = {'time': [], 'recyclable': [], 'mass': []}
+    if group_by:
+        columns['group'] = []
+    for row in rows:
+        if row[-1] is None:
+            continue
+        columns['time'].append(row[0].isoformat())
+        if group_by:
+            columns['group'].append(row[1])
+        columns['recyclable'].append(labels[row[-2]])
+        columns['mass'].append(row[-1])
+    return dict(columns, bucket=bucket, group_by=group_by)
+
+
+LEADERBOARD_ORDERS = {
+    'mass': ['-mass', 'company'],
+    'recyclable_share': ['-recyclable_share', '-mass', 'company'],
+}
+
+
+def company_leaderboard(order, limit, day_gte=None, day_lte=None):
+    """Top `limit` companies by waste mass sold or by recyclable share over
+    the [day_gte, day_lte] window, read from the daily company rollup in one
+    grouped query."""
+    rows = models.DailyCompanyWaste.objects.order_by()
+    if day_gte is not None:
+        rows = rows.filter(day__gte=day_gte)
+    if day_lte is not None:
+        rows = rows.filter(day__lte=day_lte)
+    rows = (rows
+            .values('company', 'company__name')
+            # recyclable_mass first: after the annotation 'mass' means the total
+            .annotate(recyclable_mass=Sum(Case(When(recyclable=models.RECYCLABLE, then='mass'),
+                                               default=0)))
+            .annotate(mass=Sum('mass'))
+            .filter(mass__gt=0)
+            .annotate(recyclable_share=Cast('recyclable_mass', FloatField()) / F('mass'))
+            .order_by(*LEADERBOARD_ORDERS[order]))
+    return [{'pk': row['company'],
+             'name': row['company__name'],
+             'mass': row['mass'],
+             'recyclable_mass': row['recyclable_mass'],
+             'recyclable_share': row['recyclable_share']}
+            for row in rows[:limit]]
@@ -0,0 +1,107 @@
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from backend import models, profiles, rollups
+
+
+RECYCLABLE_CLASSES = [models.RECYCLABLE, models.Recyclable.NO, models.Recyclable.DECOMPOSES]
+RECYCLABLE_WEIGHTS = [5, 3, 2]
+
+PASSWORD = 'password'
+
+PLACES_PER_REGION = 20
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def barcode(i):
+    """EAN-13 of the i-th generated product."""
+    code = '460%09d' % i
+    return (code + models.gtin_check_digit(code)).zfill(14)
+
+
+def _popularity(count):
+    # Zipf-like weights: a few products and places get most of the receipts
+    return list(itertools.accumulate(1 / (rank + 1) for rank in range(count)))
+
+
+def generate(companies=100, components=500, products=5000, users=1000,
+             receipts=100000, basket=8, places=200, days=365, seed=0,
+             batch_size=5000):
+    """Fill the database with a reproducible synthetic dataset using bulk
+    inserts only, then bring the denormalized tables up to date."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    with transaction.atomic():
+        company_objs = models.Company.objects.bulk_create(
+            models.Company(name='Company %d' % i, type='type %d' % (i % 10))
+            for i in range(companies))
+
+        component_objs = models.TrashComponent.objects.bulk_create(
+            models.TrashComponent(
+                name='Component %d' % i,
+                recyclable=rng.choices(RECYCLABLE_CLASSES, RECYCLABLE_WEIGHTS)[0],
+                mass=rng.randint(1, 200))
+            for i in range(components))
+
+        product_types = max(products // 20, 1)
+        product_objs = models.Product.objects.bulk_create(
+            models.Product(name='Product %d' % i,
+                           barcode=barcode(i),
+                           company=rng.choice(company_objs),
+                           type='product type %d' % rng.randrange(product_types))
+            for i in range(products))
+        product_trash = models.Product.trash.through
+        for batch in _batches(((product.pk, component.pk)
+                               for product in product_objs
+                               for component in rng.sample(component_objs,
+                                                           rng.randint(1, min(4, components)))),
+                              batch_size):
+            product_trash.objects.bulk_create(
+                product_trash(product_id=product_id, trashcomponent_id=component_id)
+                for product_id, component_id in batch)
+        for batch in _batches((product.pk for product in product_objs), batch_size):
+            profiles.refresh_products(batch)
+
+        password = make_password(PASSWORD)
+        user_objs = User.objects.bulk_create(
+            User(username='user%d' % i, password=password) for i in range(users))
+
+        product_weights = _popularity(len(product_objs))
+        region_objs = models.Place.objects.bulk_create(
+            models.Place(name='Region %d' % i, key=models.place_key('Region %d' % i))
+            for i in range(max(places // PLACES_PER_REGION, 1)))
+        place_objs = models.Place.objects.bulk_create(
+            models.Place(name='Place %d' % i, key=models.place_key('Place %d' % i),
+                         parent=region_objs[i // PLACES_PER_REGION % len(region_objs)])
+            for i in range(places))
+        place_weights = _popularity(places)
+        receipt_products = models.Receipt.products.through
+        for batch in _batches(range(receipts), batch_size):
+            receipt_objs = models.Receipt.objects.bulk_create(
+                models.Receipt(
+                    time=now - timedelta(seconds=rng.randrange(days * 24 * 3600)),
+                    place=rng.choices(place_objs, cum_weights=place_weights)[0],
+                    user=rng.choice(user_objs) if user_objs else None)
+                for _ in batch)
+            rows = []
+            for receipt in receipt_objs:
+                size = min(rng.randint(1, 2 * basket - 1), len(product_objs))
+                chosen = set(rng.choices(product_objs, cum_weights=product_weights, k=size))
+                rows += [receipt_products(receipt_id=receipt.pk, product_id=product.pk)
+                         for product in chosen]
+            receipt_products.objects.bulk_create(rows, batch_size=batch_size)
+        rollups.rebuild()
@@ -1,3 +1,550 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 
+from rest_framework.renderers import JSONRenderer
+
+from backend import (authentication, fastread, middleware, models, rollups, serializers,
+                     synthetic)
+from backend.pagination import TimeCursorPagination
+
 # Create your tests here.
+class FastReadTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='user')
+        companies = [models.Company.objects.create(name='Company %d' % i, type='shop')
+                     for i in range(2)]
+        components = [models.TrashComponent.objects.create(
+                          name='Component %d' % i, mass=10 + i,
+                          recyclable=list(models.Recyclable)[i % 3])
+                      for i in range(5)]
+        products = []
+        for i in range(6):
+            product = models.Product.objects.create(name='Product %d' % i, type='milk',
+                                                    company=companies[i % 2],
+                                                    barcode=synthetic.barcode(i) if i < 2 else None)
+            product.trash.set(components[i % 5:i % 5 + 2])
+            products.append(product)
+        places = models.Place.objects.resolve(['Place 0', 'Place 1', 'Empty'])
+        for i in range(4):
+            receipt = models.Receipt.objects.create(
+                time=datetime(2023, 11, 13, 17, i, 26, 798000, tzinfo=timezone.utc),
+                place_id=places['Place %d' % (i % 2)], user=user if i % 2 else None)
+            receipt.products.set(products[i:i + 3])
+        models.Receipt.objects.create(time=datetime(2023, 11, 14, tzinfo=timezone.utc),
+                                      place_id=places['Empty'])
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def test_products_match_serializer(self):
+        pks = list(models.Product.objects.order_by('-pk').values_list('pk', flat=True))
+        queryset = models.Product.objects.with_trash()
+        expected = [serializers.ProductGetSerializer(queryset.get(pk=pk)).data for pk in pks]
+        self.assertEqual(self.render(fastread.product_list(pks)), self.render(expected))
+
+    def test_receipts_match_serializer(self):
+        pks = list(models.Receipt.objects.order_by('-pk').values_list('pk', flat=True))
+        queryset = models.Receipt.objects.with_products()
+        expected = [serializers.ReceiptGetSerializer(queryset.get(pk=pk)).data for pk in pks]
+        self.assertEqual(self.render(fastread.receipt_list(pks)), self.render(expected))
+
+    def test_endpoints_match_serializer(self):
+        receipt = models.Receipt.objects.with_products().first()
+        response = self.client.get('/receipt/?pk=%d' % receipt.pk)
+        self.assertEqual(response.content,
+                         self.render(serializers.ReceiptGetSerializer(receipt).data))
+
+        product = models.Product.objects.with_trash().first()
+        response = self.client.get('/product/?pk=%d' % product.pk)
+        self.assertEqual(response.content,
+                         self.render(serializers.ProductGetSerializer(product).data))
+
+    def test_missing_objects(self):
+        self.assertEqual(fastread.product_list([0]), [])
+        self.assertEqual(self.client.get('/receipt/?pk=0').status_code, 404)
+
+
+class RollupTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.company = models.Company.objects.create(name='Company', type='shop')
+        self.components = [models.TrashComponent.objects.create(
+                               name='Component %d' % i, mass=10,
+                               recyclable=list(models.Recyclable)[i])
+                           for i in range(3)]
+        self.product = models.Product.objects.create(name='Product', type='milk',
+                                                     company=self.company)
+        self.product.trash.set(self.components[:1])
+        self.place = models.Place.objects.get(pk=models.Place.objects.resolve(['Place'])['Place'])
+
+    def rollups(self):
+        return {model.__name__: sorted(model.objects.filter(mass__gt=0)
+                                       .values_list('day', field, 'recyclable', 'mass'))
+                for model, field, _ in rollups.ROLLUPS}
+
+    def assertRebuilt(self):
+        maintained = self.rollups()
+        rollups.rebuild()
+        self.assertEqual(maintained, self.rollups())
+        self.assertFalse(any(model.objects.filter(mass__lt=0).exists()
+                             for model, _, _ in rollups.ROLLUPS))
+
+    def test_receipt_edits(self):
+        receipt = models.Receipt.objects.create(
+            time=datetime(2023, 11, 13, tzinfo=timezone.utc), place=self.place, user=self.user)
+        receipt.products.set([self.product])
+        self.assertRebuilt()
+        receipt.time = datetime(2023, 11, 14, tzinfo=timezone.utc)
+        receipt.save()
+        self.assertRebuilt()
+        receipt.delete()
+        self.assertRebuilt()
+
+    def test_catalogue_edits(self):
+        receipt = models.Receipt.objects.create(
+            time=datetime(2023, 11, 13, tzinfo=timezone.utc), place=self.place, user=self.user)
+        receipt.products.set([self.product])
+        self.product.trash.add(self.components[1])
+        self.assertRebuilt()
+        self.components[0].mass = 30
+        self.components[0].save()
+        self.assertRebuilt()
+        self.components[1].delete()
+        self.assertRebuilt()
+        receipt.delete()
+        self.assertRebuilt()
+        self.assertEqual(self.rollups(), {model.__name__: [] for model, _, _ in rollups.ROLLUPS})
+
+    def receipt_with_products(self):
+        other = models.Product.objects.create(name='Other', type='milk', company=self.company)
+        other.trash.set(self.components[1:])
+        receipt = models.Receipt.objects.create(
+            time=datetime(2023, 11, 13, tzinfo=timezone.utc), place=self.place, user=self.user)
+        receipt.products.set([self.product, other])
+        return other
+
+    def test_company_change(self):
+        self.receipt_with_products()
+        company = models.Company.objects.create(name='Other company', type='shop')
+        self.product.company = company
+        self.product.save()
+        self.assertRebuilt()
+        self.assertEqual(models.DailyCompanyWaste.objects.get(company=company).mass, 10)
+
+    def test_product_delete(self):
+        self.receipt_with_products()
+        self.product.delete()
+        self.assertRebuilt()
+
+    def test_products_delete(self):
+        # several products of one receipt in one delete
+        self.receipt_with_products()
+        models.Product.objects.all().delete()
+        self.assertRebuilt()
+        self.assertEqual(self.rollups(), {model.__name__: [] for model, _, _ in rollups.ROLLUPS})
+
+    def test_company_delete(self):
+        other = self.receipt_with_products()
+        company = models.Company.objects.create(name='Other company', type='shop')
+        other.company = company
+        other.save()
+        self.company.delete()
+        self.assertRebuilt()
+        self.assertEqual(sum(models.DailyPlaceWaste.objects.values_list('mass', flat=True)), 20)
+        company.delete()
+        self.assertRebuilt()
+
+
+class LeaderboardTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        companies = [models.Company.objects.create(name='Company %d' % i, type='shop')
+                     for i in range(4)]
+        components = [models.TrashComponent.objects.create(
+                          name='Component %d' % i, mass=5 + 3 * i,
+                          recyclable=list(models.Recyclable)[i % 4])
+                      for i in range(6)]
+        products = []
+        for i in range(8):
+            product = models.Product.objects.create(name='Product %d' % i, type='milk',
+                                                    company=companies[i % 3])
+            product.trash.set(components[i % 6:i % 6 + 1 + i % 2])
+            products.append(product)
+        place = models.Place.objects.resolve(['Place'])['Place']
+        for i in range(6):
+            receipt = models.Receipt.objects.create(
+                time=datetime(2023, 11, 13 + i % 3, tzinfo=timezone.utc), place_id=place)
+            receipt.products.set(products[i:i + 1 + i % 3])
+
+    def expected(self, order, day_gte=None, day_lte=None):
+        # summed over the receipts, products and components themselves
+        totals = {}
+        for receipt in models.Receipt.objects.all():
+            day = receipt.time.date()
+            if day_gte and day < day_gte or day_lte and day > day_lte:
+                continue
+            for product in receipt.products.all():
+                company = product.company
+                total = totals.setdefault(company.pk, {'pk': company.pk, 'name': company.name,
+                                                       'mass': 0, 'recyclable_mass': 0})
+                for component in product.trash.all():
+                    total['mass'] += component.mass
+                    if component.recyclable == models.RECYCLABLE:
+                        total['recyclable_mass'] += component.mass
+        rows = [dict(total, recyclable_share=total['recyclable_mass'] / total['mass'])
+                for total in totals.values() if total['mass']]
+        if order == 'mass':
+            rows.sort(key=lambda row: (-row['mass'], row['pk']))
+        else:
+            rows.sort(key=lambda row: (-row['recyclable_share'], -row['mass'], row['pk']))
+        return rows
+
+    def assertLeaderboard(self, order, **days):
+        query = dict({name: day.isoformat() for name, day in days.items()}, order=order)
+        response = self.client.get('/company/leaderboard', query)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.expected(order, **days))
+
+    def test_matches_receipts(self):
+        for order in ('mass', 'recyclable_share'):
+            self.assertLeaderboard(order)
+            self.assertLeaderboard(order, day_gte=datetime(2023, 11, 14).date())
+            self.assertLeaderboard(order, day_lte=datetime(2023, 11, 13).date())
+
+    def test_company_change(self):
+        product = models.Product.objects.get(name='Product 1')
+        product.company = models.Company.objects.get(name='Company 3')
+        product.save()
+        for order in ('mass', 'recyclable_share'):
+            self.assertLeaderboard(order)
+
+    def test_limit(self):
+        response = self.client.get('/company/leaderboard', {'limit': 2})
+        self.assertEqual(response.json(), self.expected('mass')[:2])
+        self.assertEqual(self.client.get('/company/leaderboard', {'order': 'name'}).status_code, 400)
+
+
+class NegotiationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(20):
+            models.Company.objects.create(name='Company %d %s' % (i, 'x' * 200), type='shop')
+
+    def test_media_type_in_validators(self):
+        pk = models.Company.objects.first().pk
+        for url in ('/company/', '/company/?pk=%d' % pk):
+            json = self.client.get(url, HTTP_ACCEPT='application/json')
+            html = self.client.get(url, HTTP_ACCEPT='text/html')
+            self.assertEqual(html['Content-Type'], 'text/html; charset=utf-8')
+            self.assertNotEqual(json['ETag'], html['ETag'])
+            for response in (json, html):
+                self.assertIn('Accept', response['Vary'])
+            # the HTML representation doesn't validate the JSON one
+            response = self.client.get(url, HTTP_ACCEPT='application/json',
+                                       HTTP_IF_NONE_MATCH=html['ETag'])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, json.content)
+            response = self.client.get(url, HTTP_ACCEPT='application/json',
+                                       HTTP_IF_NONE_MATCH=json['ETag'])
+            self.assertEqual(response.status_code, 304)
+            self.assertIn('Accept', response['Vary'])
+        response = self.client.post('/company/batch', {'pk': [pk]}, content_type='application/json')
+        self.assertIn('Accept', response['Vary'])
+
+    def test_gzip_is_padded(self):
+        responses = [self.client.get('/company/', HTTP_ACCEPT_ENCODING='gzip') for _ in range(4)]
+        for response in responses:
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response['Vary'])
+        # GZipMiddleware's random padding against BREACH
+        self.assertGreater(len({response.content for response in responses}), 1)
+        self.assertNotIn('Content-Encoding', self.client.get('/company/?pk=1'))
+
+    @skipIf(middleware.brotli is None, 'brotli is not installed')
+    def test_brotli_on_safe_requests(self):
+        response = self.client.get('/company/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        pks = list(models.Company.objects.values_list('pk', flat=True))
+        response = self.client.post('/company/batch', {'pk': pks}, content_type='application/json',
+                                    HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class ConditionalGetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.components = [models.TrashComponent.objects.create(
+                              name='Component %d' % i, mass=10, recyclable=models.RECYCLABLE)
+                          for i in range(2)]
+        company = models.Company.objects.create(name='Company', type='shop')
+        for i in range(3):
+            product = models.Product.objects.create(name='Product %d' % i, type='milk',
+                                                    company=company)
+            product.trash.set(cls.components[:1])
+
+    def assertNotModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_object(self):
+        product = models.Product.objects.first()
+        url = '/product/?pk=%d' % product.pk
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        # answered from the product's updated_at, the product isn't loaded
+        with self.assertNumQueries(1):
+            self.assertNotModified(url, etag)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        product.trash.add(self.components[1])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['trash_set']), 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list(self):
+        response = self.client.get('/product/')
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        self.assertNotModified('/product/', etag)
+
+        # an object of the page changes
+        product = models.Product.objects.first()
+        product.name = 'Renamed'
+        product.save()
+        response = self.client.get('/product/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        etag = response['ETag']
+        self.assertNotModified('/product/', etag)
+
+        # the page loses an object without any other getting newer
+        models.Product.objects.last().delete()
+        response = self.client.get('/product/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ProductSearchTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = models.Company.objects.create(name='Company', type='shop')
+        for name in ('Молоко Простоквашино 1л', 'Молоко Домик в деревне', 'Кефир молочный',
+                     'Oat drink', 'Oat milk'):
+            models.Product.objects.create(name=name, type='milk', company=company)
+
+    def search(self, q, **params):
+        response = self.client.get('/product/search', dict(params, q=q))
+        self.assertEqual(response.status_code, 200)
+        return [product['name'] for product in response.json()]
+
+    def test_prefixes(self):
+        self.assertEqual(set(self.search('мол')),
+                         {'Молоко Простоквашино 1л', 'Молоко Домик в деревне', 'Кефир молочный'})
+        self.assertEqual(self.search('МОЛОКО дом'), ['Молоко Домик в деревне'])
+        self.assertEqual(set(self.search('oat')), {'Oat drink', 'Oat milk'})
+        self.assertEqual(len(self.search('мол', limit=2)), 2)
+        self.assertEqual(self.search('сок'), [])
+        self.assertEqual(self.client.get('/product/search', {'q': ' '}).status_code, 400)
+
+    def test_index_follows_products(self):
+        product = models.Product.objects.get(name='Oat drink')
+        product.name = 'Сок яблочный'
+        product.save()
+        self.assertEqual(self.search('oat'), ['Oat milk'])
+        self.assertEqual(self.search('сок'), ['Сок яблочный'])
+        product.delete()
+        self.assertEqual(self.search('сок'), [])
+
+
+class BarcodeTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = models.Company.objects.create(name='Company', type='shop')
+        cls.component = models.TrashComponent.objects.create(name='Component', mass=10,
+                                                             recyclable=models.RECYCLABLE)
+        cls.product = models.Product.objects.create(name='Product', type='milk', company=company,
+                                                    barcode=synthetic.barcode(1))
+        cls.product.trash.set([cls.component])
+
+    def lookup(self, code):
+        return self.client.get('/product/barcode', {'code': code})
+
+    def test_lookup(self):
+        expected = self.client.get('/product/?pk=%d' % self.product.pk).json()
+        ean13 = synthetic.barcode(1).lstrip('0')
+        for code in (ean13, synthetic.barcode(1)):
+            response = self.lookup(code)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected)
+        # a hot product is served from the cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.lookup(ean13).json(), expected)
+
+        self.assertEqual(self.lookup(synthetic.barcode(2)).status_code, 404)
+        self.assertEqual(self.lookup(ean13[:-1] + str((int(ean13[-1]) + 1) % 10)).status_code, 400)
+        self.assertEqual(self.lookup('').status_code, 400)
+
+    def test_trash_change(self):
+        ean13 = synthetic.barcode(1).lstrip('0')
+        self.assertEqual(self.lookup(ean13).json()['trash_mass'], 10)
+        self.component.mass = 25
+        self.component.save()
+        self.assertEqual(self.lookup(ean13).json()['trash_mass'], 25)
+
+
+class MultiGetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        company = models.Company.objects.create(name='Company', type='shop')
+        components = [models.TrashComponent.objects.create(
+                          name='Component %d' % i, mass=10, recyclable=models.RECYCLABLE)
+                      for i in range(3)]
+        for i in range(5):
+            product = models.Product.objects.create(name='Product %d' % i, type='milk',
+                                                    company=company)
+            product.trash.set(components[:i % 3 + 1])
+
+    def test_per_item_results(self):
+        for name, model in (('product', models.Product),
+                            ('trashcomponent', models.TrashComponent),
+                            ('company', models.Company)):
+            pks = list(model.objects.order_by('-pk').values_list('pk', flat=True))
+            requested = pks + [0, pks[0]]
+            expected = {'results': [self.client.get('/%s/?pk=%d' % (name, pk)).json()
+                                    for pk in pks],
+                        'missing': [0]}
+            response = self.client.get('/%s/?pk=%s' % (name, ','.join(map(str, requested))))
+            self.assertEqual(response.json(), expected)
+            response = self.client.post('/%s/batch' % name, {'pk': requested},
+                                        content_type='application/json')
+            self.assertEqual(response.json(), expected)
+
+    def test_one_read(self):
+        pks = ','.join(str(pk) for pk in models.Product.objects.values_list('pk', flat=True))
+        # validators, products and their trash, whatever the number of products
+        with self.assertNumQueries(3):
+            self.client.get('/product/?pk=%s,0' % pks)
+        with self.assertNumQueries(3):
+            self.client.get('/product/?pk=%s,0' % pks.split(',')[0])
+
+    def test_invalid(self):
+        self.assertEqual(self.client.get('/product/?pk=1,x').status_code, 400)
+        for body in ({'pk': []}, {'pk': ['1']}, {'pk': [True]}, {'pk': list(range(101))}, [1]):
+            response = self.client.post('/product/batch', body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+
+class ReplicaPinTestCase(TestCase):
+    def post(self, url, data):
+        return self.client.post(url, data, content_type='application/json')
+
+    def test_only_writes_pin(self):
+        response = self.post('/company/', {'name': 'Company', 'type': 'shop'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('pin_primary', response.cookies)
+
+        self.client.cookies.clear()
+        pk = models.Company.objects.get().pk
+        response = self.post('/company/batch', {'pk': [pk, 0]})
+        self.assertEqual(response.json()['missing'], [0])
+        self.assertNotIn('pin_primary', response.cookies)
+        response = self.post('/company/', {'name': 'Company'})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('pin_primary', response.cookies)
+        self.assertNotIn('pin_primary', self.client.get('/company/').cookies)
+
+
+@mock.patch.object(TimeCursorPagination, 'page_size', 2)
+class CursorPaginationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        places = models.Place.objects.resolve(['A', 'B'])
+        start = datetime(2023, 11, 13, tzinfo=timezone.utc)
+        # receipts 1 to 4 share a time, so pages split ties on the pk
+        for i in range(7):
+            models.Receipt.objects.create(time=start + timedelta(hours=max(i - 3, 0)),
+                                          place_id=places['AB'[i % 2]])
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([receipt['pk'] for receipt in response.json()['results']])
+            url = response.json()[link]
+        return pages
+
+    def test_round_trip(self):
+        expected = list(models.Receipt.objects.order_by('time', 'pk').values_list('pk', flat=True))
+        pages = self.walk('/receipt/?pagination=cursor', 'next')
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertTrue(all(len(page) == 2 for page in pages[:-1]))
+
+        last = self.client.get('/receipt/?pagination=cursor').json()
+        while last['next']:
+            last = self.client.get(last['next']).json()
+        backwards = self.walk(last['previous'], 'previous')
+        self.assertEqual(backwards, pages[-2::-1])
+
+    def test_filters_are_kept(self):
+        expected = list(models.Receipt.objects.filter(place__name='A')
+                        .order_by('time', 'pk').values_list('pk', flat=True))
+        pages = self.walk('/receipt/?pagination=cursor&place=A', 'next')
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+    def test_invalid_cursor(self):
+        for cursor in ['garbage', 'WzEsMl0=']:
+            response = self.client.get('/receipt/?pagination=cursor&cursor=' + cursor)
+            self.assertEqual(response.status_code, 404)
+
+
+class BulkReceiptTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='user')
+        company = models.Company.objects.create(name='Company', type='shop')
+        component = models.TrashComponent.objects.create(name='Component', mass=10,
+                                                         recyclable=models.Recyclable.YES)
+        cls.product = models.Product.objects.create(name='Product', type='milk', company=company)
+        cls.product.trash.set([component])
+
+    def post(self, receipts):
+        token = authentication.ClaimsRefreshToken.for_user(self.user).access_token
+        return self.client.post('/receipt/bulk', receipts, content_type='application/json',
+                                HTTP_AUTHORIZATION='Bearer %s' % token)
+
+    def test_per_item_results(self):
+        response = self.post([
+            {'products': [self.product.pk, self.product.pk], 'time': '2023-11-13T10:00:00Z',
+             'place': 'Place'},
+            {'products': [0], 'time': '2023-11-13T11:00:00Z', 'place': 'Place'},
+            {'products': [self.product.pk], 'time': 'yesterday', 'place': 'Place'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['created'], 1)
+        self.assertEqual(set(data['results'][1]['errors']), {'products'})
+        self.assertEqual(set(data['results'][2]['errors']), {'time'})
+
+        receipt = models.Receipt.objects.get(pk=data['results'][0]['pk'])
+        self.assertEqual(receipt.user_id, self.user.pk)
+        self.assertEqual(list(receipt.products.values_list('pk', flat=True)), [self.product.pk])
+        self.assertEqual(list(models.DailyUserWaste.objects.values_list(
+                             'day', 'user', 'recyclable', 'mass')),
+                         [(receipt.time.date(), self.user.pk, models.Recyclable.YES, 10)])
+
+    def test_all_invalid(self):
+        response = self.post([{'products': [0], 'time': '2023-11-13T10:00:00Z', 'place': 'Place'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['created'], 0)
+        self.assertFalse(models.Receipt.objects.exists())
+        self.assertEqual(self.post({'products': []}).status_code, 400)
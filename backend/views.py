@@ -1,15 +1,19 @@
+import datetime
+
 from django.shortcuts import render, get_object_or_404
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import check_password, make_password
+from django.db import transaction
 
 from rest_framework import viewsets
 
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.filters import OrderingFilter
 from rest_framework.serializers import CharField
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 
 from django_filters.rest_framework import DjangoFilterBackend, DateTimeFilter
@@ -17,7 +21,14 @@ from django_filters.rest_framework import DjangoFilterBackend, DateTimeFilter
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from backend import models, serializers, permissions
+from backend import models, serializers, permissions, rollups, export, cache, metrics, fastread, search, barcodes, reports
+from backend.filters import ReceiptFilter, TrashComponentFilter
+from backend.multiget import MultiGetMixin, parse_ids
+from backend.authentication import ClaimsRefreshToken
+from backend.conditional import conditional
+from backend.pagination import TimeCursorPagination
+from backend.stats import (waste_statistics, waste_timeseries, company_leaderboard,
+                           TIMESERIES_BUCKETS, TIMESERIES_GROUPS, LEADERBOARD_ORDERS)
 # Create your views here.
 
 headers = {
@@ -26,7 +37,7 @@ headers = {
         }
 
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(MultiGetMixin, viewsets.ModelViewSet):
     queryset = models.Company.objects.all()
     serializer_class = serializers.CompanySerializer
     pagination_class = PageNumberPagination
@@ -34,7 +45,7 @@ class CompanyViewSet(viewsets.ModelViewSet):
     filterset_fields = ['name', 'type']
 
     company_pk = openapi.Parameter('pk', openapi.IN_QUERY, 
-                        description="Id of a company to get details of", 
+                        description="Id of a company to get details of, or comma separated ids", 
                         type=openapi.TYPE_INTEGER)
     company_name = openapi.Parameter('name', openapi.IN_QUERY, 
                         description="Name of companies to filter by", 
@@ -47,10 +58,17 @@ class CompanyViewSet(viewsets.ModelViewSet):
                          manual_parameters=[company_pk,
                                             company_name,
                                             company_type])
+    @conditional()
+    @cache.cached_response(models.Company)
     def retrieve(self, request):
         pk = request.GET.get('pk')
         if not pk:
             return super().list(request)
+        if ',' in pk:
+            pks = parse_ids(pk)
+            if pks is None:
+                return Response("Query parameter 'pk' is not a list of numbers", status=400)
+            return self.multiget(pks)
         if not pk.isdigit():
             return Response("Query parameter 'pk' is not a number", status=400, headers=headers) 
         self.kwargs['pk'] = pk
@@ -63,22 +81,60 @@ class CompanyViewSet(viewsets.ModelViewSet):
         self.kwargs['pk'] = pk
         return super().update(request)
 
-
-class TrashComponentViewSet(viewsets.ModelViewSet):
+    leaderboard_limit_max = 100
+    leaderboard_order = openapi.Parameter('order', openapi.IN_QUERY, 
+                        description="Rank by 'mass' (default) or 'recyclable_share'", 
+                        type=openapi.TYPE_STRING)
+    leaderboard_day_ge = openapi.Parameter('day_gte', openapi.IN_QUERY, 
+                        description="First day (YYYY-MM-DD) of the ranked period", 
+                        type=openapi.TYPE_STRING)
+    leaderboard_day_le = openapi.Parameter('day_lte', openapi.IN_QUERY, 
+                        description="Last day (YYYY-MM-DD) of the ranked period", 
+                        type=openapi.TYPE_STRING)
+    leaderboard_limit = openapi.Parameter('limit', openapi.IN_QUERY, 
+                        description="Number of companies to return (default 10, at most 100)", 
+                        type=openapi.TYPE_INTEGER)
+    @swagger_auto_schema(responses={400: 'Invalid order, day or limit'},
+                         manual_parameters=[leaderboard_order,
+                                            leaderboard_day_ge,
+                                            leaderboard_day_le,
+                                            leaderboard_limit])
+    def leaderboard(self, request):
+        order = request.GET.get('order', 'mass')
+        if order not in LEADERBOARD_ORDERS:
+            return Response("Query parameter 'order' must be one of: %s"
+                            % ', '.join(LEADERBOARD_ORDERS), status=400)
+        limit = request.GET.get('limit', '10')
+        if not limit.isdigit():
+            return Response("Query parameter 'limit' is not a number", status=400)
+        limit = min(int(limit), self.leaderboard_limit_max)
+        days = {}
+        for param in ('day_gte', 'day_lte'):
+            value = request.GET.get(param)
+            if value is None:
+                continue
+            try:
+                days[param] = datetime.date.fromisoformat(value)
+            except ValueError:
+                return Response("Query parameter '%s' is not a date" % param, status=400)
+        return Response(company_leaderboard(order, limit, **days))
+
+
+class TrashComponentViewSet(MultiGetMixin, viewsets.ModelViewSet):
     queryset = models.TrashComponent.objects.all()
     serializer_class = serializers.TrashComponentSerializer
     pagination_class = PageNumberPagination
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['name', 'recyclable', 'mass']
+    filterset_class = TrashComponentFilter
 
     trashcomponent_pk = openapi.Parameter('pk', openapi.IN_QUERY, 
-                        description="Id of a trash component to get details of", 
+                        description="Id of a trash component to get details of, or comma separated ids", 
                         type=openapi.TYPE_INTEGER)
     trashcomponent_name = openapi.Parameter('name', openapi.IN_QUERY, 
                         description="Name of trash components to filter by", 
                         type=openapi.TYPE_STRING)
     trashcomponent_recyclable = openapi.Parameter('recyclable', openapi.IN_QUERY, 
-                        description="Recyclability of trash components to filter by", 
+                        description="Recyclability of trash components to filter by: %s" % ', '.join(models.Recyclable.labels), 
                         type=openapi.TYPE_STRING)
     trashcomponent_mass = openapi.Parameter('mass', openapi.IN_QUERY, 
                         description="Mass of trash components to filter by", 
@@ -89,10 +145,17 @@ class TrashComponentViewSet(viewsets.ModelViewSet):
                                             trashcomponent_name,
                                             trashcomponent_recyclable,
                                             trashcomponent_mass])
+    @conditional()
+    @cache.cached_response(models.TrashComponent)
     def retrieve(self, request, **kwargs):
         pk = request.GET.get('pk')
         if not pk:
             return super().list(self, request)
+        if ',' in pk:
+            pks = parse_ids(pk)
+            if pks is None:
+                return Response("Query parameter 'pk' is not a list of numbers", status=400)
+            return self.multiget(pks)
         if not pk.isdigit():
             return Response("Query parameter 'pk' is not a number", status=400) 
         self.kwargs['pk'] = pk
@@ -106,8 +169,8 @@ class TrashComponentViewSet(viewsets.ModelViewSet):
         return super().update(request)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = models.Product.objects.all()
+class ProductViewSet(MultiGetMixin, viewsets.ModelViewSet):
+    queryset = models.Product.objects.with_trash()
     serializer_class = serializers.ProductGetSerializer
     pagination_class = PageNumberPagination
     filter_backends = [DjangoFilterBackend]
@@ -115,7 +178,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     # permission_classes = [permissions.OwnerOrReadOnly]
 
     product_pk = openapi.Parameter('pk', openapi.IN_QUERY, 
-                        description="Id of a product to get details of", 
+                        description="Id of a product to get details of, or comma separated ids", 
                         type=openapi.TYPE_INTEGER)
     product_name = openapi.Parameter('name', openapi.IN_QUERY, 
                         description="Name of products to filter by", 
@@ -132,14 +195,25 @@ class ProductViewSet(viewsets.ModelViewSet):
                                             product_name,
                                             product_company,
                                             product_type])
+    @conditional()
+    @cache.cached_response(models.Product, models.TrashComponent)
     def retrieve(self, request, **kwargs):
         pk = request.GET.get('pk')
         if not pk:
-            return super().list(self, request)
+            queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset.values_list('pk', flat=True))
+            return self.get_paginated_response(fastread.product_list(page))
+        if ',' in pk:
+            pks = parse_ids(pk)
+            if pks is None:
+                return Response("Query parameter 'pk' is not a list of numbers", status=400)
+            return self.multiget(pks)
         if not pk.isdigit():
             return Response("Query parameter 'pk' is not a number", status=400) 
-        self.kwargs['pk'] = pk
-        return super().retrieve(self, request)
+        data = fastread.product_list([int(pk)])
+        if not data:
+            raise NotFound()
+        return Response(data[0])
 
     @swagger_auto_schema(responses={},
                         request_body=serializers.ProductPutSerializer)
@@ -156,19 +230,87 @@ class ProductViewSet(viewsets.ModelViewSet):
         self.serializer_class = serializers.ProductSerializer
         return super().create(request)
 
+    alternatives_max_limit = 50
+
+    alternatives_pk = openapi.Parameter('pk', openapi.IN_QUERY, 
+                        description="Id of a product to find alternatives for", 
+                        type=openapi.TYPE_INTEGER, required=True)
+    alternatives_limit = openapi.Parameter('limit', openapi.IN_QUERY, 
+                        description="Number of alternatives to return, 5 by default", 
+                        type=openapi.TYPE_INTEGER)
+    @swagger_auto_schema(responses={200: serializers.ProductGetSerializer(many=True),
+                                    400: 'Product id or limit is not a number',
+                                    404: 'Invalid product id'},
+                         manual_parameters=[alternatives_pk,
+                                            alternatives_limit])
+    @cache.cached_response(models.Product, models.TrashComponent)
+    def alternatives(self, request):
+        pk = request.GET.get('pk', '')
+        limit = request.GET.get('limit', '5')
+        if not pk.isdigit():
+            return Response("Query parameter 'pk' is not a number", status=400) 
+        if not limit.isdigit():
+            return Response("Query parameter 'limit' is not a number", status=400) 
+        limit = min(int(limit), self.alternatives_max_limit)
+        product = get_object_or_404(models.Product.objects.only('type'), pk=pk)
+        # served by the (type, -recyclable_share) index
+        pks = (models.Product.objects
+               .filter(type=product.type)
+               .exclude(pk=product.pk)
+               .order_by('-recyclable_share', 'pk')
+               .values_list('pk', flat=True)[:limit])
+        return Response(fastread.product_list(pks))
+
+    def multiget_data(self, pks):
+        return fastread.products(pks)
+
+    barcode_code = openapi.Parameter('code', openapi.IN_QUERY, 
+                        description="Scanned EAN-8, UPC-A, EAN-13 or GTIN-14 barcode", 
+                        type=openapi.TYPE_STRING, required=True)
+    @swagger_auto_schema(responses={200: serializers.ProductGetSerializer,
+                                    400: 'Invalid barcode',
+                                    404: 'No product with this barcode'},
+                         manual_parameters=[barcode_code])
+    def barcode(self, request):
+        code = models.normalize_gtin(request.GET.get('code', ''))
+        if code is None:
+            return Response("Query parameter 'code' is not a valid barcode", status=400)
+        data = barcodes.lookup(code)
+        if data is None:
+            raise NotFound()
+        return Response(data)
+
+    search_max_limit = 50
+
+    search_q = openapi.Parameter('q', openapi.IN_QUERY, 
+                        description="Beginning of the words of a product name, as typed", 
+                        type=openapi.TYPE_STRING, required=True)
+    search_limit = openapi.Parameter('limit', openapi.IN_QUERY, 
+                        description="Number of products to return, 10 by default", 
+                        type=openapi.TYPE_INTEGER)
+    @swagger_auto_schema(responses={200: serializers.ProductGetSerializer(many=True),
+                                    400: 'Missing search text or limit is not a number'},
+                         manual_parameters=[search_q,
+                                            search_limit])
+    @cache.cached_response(models.Product, models.TrashComponent)
+    def search(self, request):
+        text = request.GET.get('q', '')
+        limit = request.GET.get('limit', '10')
+        if not text.strip():
+            return Response("Query parameter 'q' is required", status=400)
+        if not limit.isdigit():
+            return Response("Query parameter 'limit' is not a number", status=400) 
+        limit = min(int(limit), self.search_max_limit)
+        return Response(fastread.product_list(search.products(text, limit)))
+
 
 class ReceiptViewSet(viewsets.ModelViewSet):
-    queryset = models.Receipt.objects.all()
+    queryset = models.Receipt.objects.select_related('place').with_products()
     serializer_class = serializers.ReceiptGetSerializer
     pagination_class = PageNumberPagination
     filter_backends = [DjangoFilterBackend]
     # filterset_fields = ['products', 'place']
-    filterset_fields = {
-        'time': ['gte', 'lte'],
-        'products': ['exact'],
-        'place': ['exact'],
-        'user': ['exact'],
-    }
+    filterset_class = ReceiptFilter
     permission_classes = [permissions.IsOwnerOrReadOnly]
 
     receipt_pk = openapi.Parameter('pk', openapi.IN_QUERY, 
@@ -181,7 +323,10 @@ class ReceiptViewSet(viewsets.ModelViewSet):
                         description="The end of a time period of receipts to filter by", 
                         type=openapi.TYPE_STRING)
     receipt_place = openapi.Parameter('place', openapi.IN_QUERY, 
-                        description="Id of a company to filter receipts by", 
+                        description="Name of a place to filter receipts by", 
+                        type=openapi.TYPE_STRING)
+    receipt_region = openapi.Parameter('region', openapi.IN_QUERY, 
+                        description="Name of a region to filter receipts by, includes its places", 
                         type=openapi.TYPE_STRING)
     receipt_user = openapi.Parameter('user', openapi.IN_QUERY, 
                         description="Id of a user to filter receipts by", 
@@ -192,41 +337,39 @@ class ReceiptViewSet(viewsets.ModelViewSet):
     receipt_stats = openapi.Parameter('stats', openapi.IN_QUERY, 
                         description="Whether the respons needs to contain statistics or not. False by default", 
                         type=openapi.TYPE_BOOLEAN)
+    receipt_pagination = openapi.Parameter('pagination', openapi.IN_QUERY, 
+                        description="Set to 'cursor' to page through receipts ordered by time with next/previous cursors and no total count", 
+                        type=openapi.TYPE_STRING)
+    receipt_cursor = openapi.Parameter('cursor', openapi.IN_QUERY, 
+                        description="Opaque cursor taken from the next/previous links in cursor pagination mode", 
+                        type=openapi.TYPE_STRING)
     @swagger_auto_schema(responses={400: 'Product id is not a number',
                                     404: 'Invalid receipt id'},
                          manual_parameters=[receipt_pk,
                                             receipt_time_ge,
                                             receipt_time_le,
                                             receipt_place,
+                                            receipt_region,
                                             receipt_user,
                                             receipt_type,
-                                            receipt_stats])
+                                            receipt_stats,
+                                            receipt_pagination,
+                                            receipt_cursor])
+    @conditional(models.Product)
     def retrieve(self, request, **kwargs):
         pk = request.GET.get('pk')
         stats = request.GET.get('stats')
         if not pk:
             queryset = self.filter_queryset(self.get_queryset())
             if stats == 'true':
-                serializer_data = self.serializer_class(queryset, many=True,
-                                                   context={'request': request}).data
-                statistics = dict()
-                cum_mass = 0
-                for receipt in serializer_data:
-                    for product in receipt['products_set']:
-                        for component in product['trash_set']:
-                            recyclable = component['recyclable']
-                            mass = component['mass']
-                            cum_mass += mass
-                            if recyclable in statistics:
-                                statistics[recyclable] += mass
-                            else:
-                                statistics[recyclable] = mass
-                print(statistics)
-            result_page = self.paginator.paginate_queryset(queryset, request)
-            serializer = self.serializer_class(result_page, many=True,
-                                               context={'request': request})
-
-            response = self.paginator.get_paginated_response(serializer.data)
+                statistics, cum_mass = waste_statistics(queryset)
+            paginator = self.paginator
+            if request.GET.get('pagination') == 'cursor':
+                paginator = TimeCursorPagination()
+            result_page = paginator.paginate_queryset(queryset.values('pk', 'time'), request)
+            data = fastread.receipt_list(row['pk'] for row in result_page)
+
+            response = paginator.get_paginated_response(data)
             if stats == 'true':
                 response.data['stats'] = statistics
                 response.data['cum_mass'] = cum_mass
@@ -235,8 +378,10 @@ class ReceiptViewSet(viewsets.ModelViewSet):
             # return super().list(self, request)
         if not pk.isdigit():
             return Response("Query parameter 'pk' is not a number", status=400) 
-        self.kwargs['pk'] = pk
-        return super().retrieve(self, request)
+        data = fastread.receipt_list([int(pk)])
+        if not data:
+            raise NotFound()
+        return Response(data[0])
 
     @swagger_auto_schema(responses={201: serializers.ReceiptSerializer,
                                     403: 'Trying to update a receipt of another user'},
@@ -259,11 +404,197 @@ class ReceiptViewSet(viewsets.ModelViewSet):
         serializer = self.serializer_class(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=400)
-        obj = serializer.save()
-        obj.user = request.user
-        obj.save()
+        serializer.save(user_id=user.id)
         return Response(serializer.data, status=201)
 
+    timeseries_bucket = openapi.Parameter('bucket', openapi.IN_QUERY, 
+                        description="Size of the time buckets: 'day' (default), 'week' or 'month'", 
+                        type=openapi.TYPE_STRING)
+    timeseries_group_by = openapi.Parameter('group_by', openapi.IN_QUERY, 
+                        description="Split every bucket by 'place', 'region', 'user' or 'company'", 
+                        type=openapi.TYPE_STRING)
+    @swagger_auto_schema(responses={200: 'Column oriented series: time, group (when grouped), recyclable and mass arrays',
+                                    400: 'Unknown bucket or group_by'},
+                         manual_parameters=[receipt_time_ge,
+                                            receipt_time_le,
+                                            receipt_place,
+                                            receipt_region,
+                                            receipt_user,
+                                            timeseries_bucket,
+                                            timeseries_group_by])
+    def timeseries(self, request):
+        bucket = request.GET.get('bucket', 'day')
+        group_by = request.GET.get('group_by') or None
+        if bucket not in TIMESERIES_BUCKETS:
+            return Response("Query parameter 'bucket' must be one of: %s"
+                            % ', '.join(TIMESERIES_BUCKETS), status=400)
+        if group_by is not None and group_by not in TIMESERIES_GROUPS:
+            return Response("Query parameter 'group_by' must be one of: %s"
+                            % ', '.join(TIMESERIES_GROUPS), status=400)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(waste_timeseries(queryset, bucket, group_by))
+
+    export_output = openapi.Parameter('output', openapi.IN_QUERY, 
+                        description="Export format, 'ndjson' (default) or 'csv'", 
+                        type=openapi.TYPE_STRING)
+    @swagger_auto_schema(responses={200: 'One row per receipt, product and trash component',
+                                    400: 'Unknown export format'},
+                         manual_parameters=[receipt_time_ge,
+                                            receipt_time_le,
+                                            receipt_place,
+                                            receipt_region,
+                                            receipt_user,
+                                            export_output])
+    def export(self, request):
+        output = request.GET.get('output', 'ndjson')
+        if output not in export.CONTENT_TYPES:
+            return Response("Query parameter 'output' must be one of: %s"
+                            % ', '.join(export.CONTENT_TYPES), status=400)
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            export.stream(export.receipt_rows(queryset), output),
+            content_type=export.CONTENT_TYPES[output])
+        response['Content-Disposition'] = 'attachment; filename="receipts.%s"' % output
+        return response
+
+    bulk_max_size = 1000
+
+    @swagger_auto_schema(responses={201: 'At least one receipt was created, see per-item results',
+                                    400: 'Invalid data provided',
+                                    401: 'Unauthorized'},
+                         request_body=serializers.ReceiptBulkItemSerializer(many=True),
+                         manual_parameters=[permissions.authorization_header])
+    def bulk_create(self, request):
+        user = request.user
+        if user.is_anonymous:
+            return Response('Unauthorized', status=401)
+        if not isinstance(request.data, list):
+            return Response('Expected a list of receipts', status=400)
+        if len(request.data) > self.bulk_max_size:
+            return Response('No more than %d receipts per request' % self.bulk_max_size,
+                            status=400)
+
+        results = [None] * len(request.data)
+        valid = []
+        for i, item in enumerate(request.data):
+            serializer = serializers.ReceiptBulkItemSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((i, serializer.validated_data))
+            else:
+                results[i] = {'errors': serializer.errors}
+
+        product_ids = {pk for _, data in valid for pk in data['products']}
+        existing = set(models.Product.objects.filter(pk__in=product_ids)
+                                             .values_list('pk', flat=True))
+        accepted = []
+        for i, data in valid:
+            missing = [pk for pk in data['products'] if pk not in existing]
+            if missing:
+                results[i] = {'errors': {'products': [
+                    'Invalid pk "%s" - object does not exist.' % pk for pk in missing]}}
+            else:
+                accepted.append((i, data))
+        # only the places of accepted receipts get created
+        place_ids = models.Place.objects.resolve({data['place'] for _, data in accepted})
+        receipts = [(i, models.Receipt(time=data['time'], place_id=place_ids[data['place']],
+                                       user_id=user.id),
+                     dict.fromkeys(data['products']))
+                    for i, data in accepted]
+
+        if receipts:
+            through = models.Receipt.products.through
+            with transaction.atomic():
+                models.Receipt.objects.bulk_create([r for _, r, _ in receipts])
+                through.objects.bulk_create([
+                    through(receipt_id=receipt.pk, product_id=product_id)
+                    for _, receipt, products in receipts for product_id in products])
+                # bulk_create doesn't send signals, keep the rollups in sync here
+                rollups.add_receipts([receipt.pk for _, receipt, _ in receipts])
+        for i, receipt, _ in receipts:
+            results[i] = {'pk': receipt.pk}
+
+        return Response({'created': len(receipts), 'results': results},
+                        status=201 if receipts else 400)
+
+
+
+class ReportViewSet(viewsets.ModelViewSet):
+    queryset = models.ReportJob.objects.all()
+    serializer_class = serializers.ReportJobSerializer
+
+    report_pk = openapi.Parameter('pk', openapi.IN_QUERY, 
+                        description="Id of a report job", 
+                        type=openapi.TYPE_INTEGER, required=True)
+
+    def get_job(self, request):
+        # 401, 400 or 404 response instead of the job when there is none
+        if request.user.is_anonymous:
+            return Response('Unauthorized', status=401)
+        pk = request.GET.get('pk')
+        if not pk or not pk.isdigit():
+            return Response("Query parameter 'pk' is not a number", status=400)
+        job = self.get_queryset().filter(pk=pk, user_id=request.user.id).first()
+        if job is None:
+            raise NotFound()
+        return job
+
+    @swagger_auto_schema(responses={202: serializers.ReportJobSerializer,
+                                    400: 'Unknown report kind or invalid parameters',
+                                    401: 'Unauthorized'},
+                         request_body=serializers.ReportJobSerializer,
+                         manual_parameters=[permissions.authorization_header])
+    def create(self, request):
+        user = request.user
+        if user.is_anonymous:
+            return Response('Unauthorized', status=401)
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+        job = serializer.save(user_id=user.id)
+        reports.submit(job)
+        return Response(serializer.data, status=202)
+
+    @swagger_auto_schema(responses={200: serializers.ReportJobSerializer,
+                                    400: 'Report id is not a number',
+                                    401: 'Unauthorized',
+                                    404: 'No such report of the user'},
+                         manual_parameters=[report_pk, permissions.authorization_header])
+    def retrieve(self, request):
+        job = self.get_job(request)
+        if isinstance(job, Response):
+            return job
+        return Response(self.serializer_class(job).data)
+
+    @swagger_auto_schema(responses={200: 'The report file, JSON for stats and timeseries, CSV or NDJSON for export',
+                                    400: 'Report id is not a number',
+                                    401: 'Unauthorized',
+                                    404: 'No such report of the user',
+                                    409: 'The report is not done'},
+                         manual_parameters=[report_pk, permissions.authorization_header])
+    def download(self, request):
+        job = self.get_job(request)
+        if isinstance(job, Response):
+            return job
+        if job.status != models.ReportStatus.DONE:
+            return Response('Report is %s' % job.status, status=409)
+        return FileResponse(open(reports.result_path(job), 'rb'), as_attachment=True,
+                            filename=reports.result_name(job),
+                            content_type=reports.CONTENT_TYPES[reports.result_format(job)])
+
+
+class CacheStatsViewSet(viewsets.ViewSet):
+    @swagger_auto_schema(responses={200: 'Response cache hit and miss counters of this process'})
+    def retrieve(self, request):
+        return Response(cache.stats())
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    authentication_classes = []
+
+    @swagger_auto_schema(responses={200: 'Request metrics of this process in the Prometheus text format'})
+    def retrieve(self, request):
+        return HttpResponse(metrics.render(),
+                            content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 class AuthViewSet(viewsets.ModelViewSet):
@@ -282,7 +613,7 @@ class AuthViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=400, headers=headers)
         user = serializer.save()
-        token = RefreshToken.for_user(user)
+        token = ClaimsRefreshToken.for_user(user)
         return Response({'refresh': str(token),
                          'access': str(token.access_token)}, status=201)
         
@@ -296,7 +627,7 @@ class AuthViewSet(viewsets.ModelViewSet):
         user = get_object_or_404(self.queryset, username=request.data['username'])
         if not check_password(request.data['password'], user.password):
             return Response('Wrong password', status=401)
-        token = RefreshToken.for_user(user)
+        token = ClaimsRefreshToken.for_user(user)
         return Response({'refresh': str(token),
                          'access': str(token.access_token)})
 
@@ -305,7 +636,7 @@ class AuthViewSet(viewsets.ModelViewSet):
                          request_body=serializers.RefreshTokenSerializer)
     def refresh(self, request):
         try:
-            token = RefreshToken(request.data['refresh'])
+            token = ClaimsRefreshToken(request.data['refresh'])
         except TokenError:
             return Response('Invalid or expired token', status=400)
 
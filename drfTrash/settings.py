@@ -10,9 +10,15 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -55,22 +61,40 @@ INSTALLED_APPS = [
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.BasePagination',
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Takes the user from the token claims and checks that it still
+        # exists and is active against a short lived cache of User rows
+        'backend.authentication.CachedUserAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'backend.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'backend.renderers.ORJSONParser',
     ],
     'PAGE_SIZE': 10,
 }
+if msgpack is not None:
+    # application/msgpack is chosen through the Accept / Content-Type headers
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('backend.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('backend.renderers.MessagePackParser')
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=14),
+    "TOKEN_USER_CLASS": "backend.authentication.ClaimsUser",
 }
+# Seconds a User row loaded by ClaimsUser.instance is reused for, a deleted
+# or deactivated user is rejected by other processes after at most this long
+USER_CACHE_TTL = 30
 CORS_ALLOW_ALL_ORIGINS = True # If this is used then `CORS_ALLOWED_ORIGINS` will not have any effect
 CORS_ALLOW_CREDENTIALS = True
 
 MIDDLEWARE = [
+    'backend.middleware.TimingMiddleware',
+    'backend.middleware.CompressionMiddleware',
+    'backend.middleware.ReplicaMiddleware',
+    'backend.middleware.NegotiationMiddleware',
 
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -113,6 +137,78 @@ DATABASES = {
     }
 }
 
+# Read replicas of `default`, as a comma separated list of database files in
+# the REPLICA_DATABASES environment variable. Reads of GET requests go to
+# them (see backend/routers.py). They are not migrated, copy db.sqlite3 to
+# try it out locally.
+READ_REPLICAS = []
+for i, name in enumerate(filter(None, os.environ.get('REPLICA_DATABASES', '').split(','))):
+    DATABASES['replica%d' % i] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_REPLICAS.append('replica%d' % i)
+
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
+
+# Seconds a client reads the primary after a write, longer than the
+# replication lag
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Catalogue GET responses are cached here (see backend/cache.py). Use the
+# file based backend when running several worker processes, so that they
+# share the model versions that invalidate the responses.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+# Products kept by the barcode lookup of every process (see backend/barcodes.py)
+BARCODE_CACHE_SIZE = 10000
+
+# Worker processes computing report jobs (see backend/reports.py), 0 runs
+# them in the request instead. Their results are written to REPORTS_DIR
+REPORT_WORKERS = 2
+REPORTS_DIR = BASE_DIR / 'reports'
+
+# Responses smaller than this many bytes are sent uncompressed
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+
+
+# Logging
+# https://docs.djangoproject.com/en/4.2/topics/logging/
+# backend.timing gets one JSON line per request from TimingMiddleware at
+# INFO. They are off while DEBUG is on (and so under `manage.py test`),
+# set TIMING_LOG_LEVEL=INFO to see them anyway
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'backend.timing': {
+            'handlers': ['console'],
+            'level': os.environ.get('TIMING_LOG_LEVEL', 'WARNING' if DEBUG else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -44,15 +44,30 @@ urlpatterns = [
     path('company/', views.CompanyViewSet.as_view(actions={'post': 'create',
                                                            'get': 'retrieve',
                                                            'put': 'update'})),
+    path('company/batch', views.CompanyViewSet.as_view(actions={'post': 'batch'})),
+    path('company/leaderboard', views.CompanyViewSet.as_view(actions={'get': 'leaderboard'})),
     path('trashcomponent/', views.TrashComponentViewSet.as_view(actions={'post': 'create',
                                                            'get': 'retrieve',
                                                            'put': 'update'})),
+    path('trashcomponent/batch', views.TrashComponentViewSet.as_view(actions={'post': 'batch'})),
     path('product/', views.ProductViewSet.as_view(actions={'post': 'create',
                                                            'get': 'retrieve',
                                                            'put': 'update'})),
+    path('product/batch', views.ProductViewSet.as_view(actions={'post': 'batch'})),
+    path('product/barcode', views.ProductViewSet.as_view(actions={'get': 'barcode'})),
+    path('product/search', views.ProductViewSet.as_view(actions={'get': 'search'})),
+    path('product/alternatives', views.ProductViewSet.as_view(actions={'get': 'alternatives'})),
     path('receipt/', views.ReceiptViewSet.as_view(actions={'post': 'create',
                                                            'get': 'retrieve',
                                                            'put': 'update'})),
+    path('receipt/timeseries', views.ReceiptViewSet.as_view(actions={'get': 'timeseries'})),
+    path('receipt/export', views.ReceiptViewSet.as_view(actions={'get': 'export'})),
+    path('receipt/bulk', views.ReceiptViewSet.as_view(actions={'post': 'bulk_create'})),
+    path('report/', views.ReportViewSet.as_view(actions={'post': 'create',
+                                                         'get': 'retrieve'})),
+    path('report/download', views.ReportViewSet.as_view(actions={'get': 'download'})),
+    path('metrics', views.MetricsViewSet.as_view(actions={'get': 'retrieve'})),
+    path('cache/stats', views.CacheStatsViewSet.as_view(actions={'get': 'retrieve'})),
     path('auth/register', views.AuthViewSet.as_view(actions={'post': 'register'})),
     path('auth/login',    views.AuthViewSet.as_view(actions={'post': 'login'})),
     path('auth/refresh',  views.AuthViewSet.as_view(actions={'post': 'refresh'})),